@@ -1,53 +1,391 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 import sqlite3
 import os
+import sys
 import time
 import re
 import requests
 import json
 import subprocess
+import contextlib
+import uuid
+import unicodedata
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+import difflib
+import socket
+from urllib.parse import urlparse, quote
+import threading
+import itertools
+import queue
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from youtube_transcript_api import YouTubeTranscriptApi
+import config
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 app = Flask(__name__)
-DB_PATH = '/tmp/srimad_bhagavatam.db'
+DB_PATH = config.DB_PATH
+
+# Number of chapters in each canto of Śrīmad-Bhāgavatam
+CHAPTERS_PER_CANTO = {1: 19, 2: 10, 3: 33, 4: 31, 5: 26, 6: 19, 7: 15, 8: 24, 9: 24, 10: 90, 11: 31, 12: 13}
+
+
+def pack_verse_key(canto, chapter, verse):
+    """Pack a verse reference into one integer (also the rowid of its search index entries)"""
+    return (canto << 16) | (chapter << 8) | verse
+
+
+def verse_key_in_range(canto, chapter, verse):
+    """Whether a reference packs without spilling into a neighbouring chapter's keys"""
+    return canto in CHAPTERS_PER_CANTO and 0 <= chapter < 256 and 0 <= verse < 256
+
+
+def unpack_verse_key(key):
+    return key >> 16, (key >> 8) & 0xFF, key & 0xFF
+
+
+# Same packing in SQL, for statements that work on whole tables
+VERSE_KEY_SQL = '((canto << 16) | (chapter << 8) | verse)'
+
 PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLyepYeJqc4uE3d3CHZbUP9eS6jI471qbK"
 MAPPING_CACHE_FILE = '/tmp/video_mappings.json'
 
+# ==================== DATABASE CONNECTIONS ====================
+
+class ConnectionPool:
+    """Reusable SQLite connections in WAL mode, so readers don't wait on the writer"""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._path = None
+        self._pid = None
+
+    def _open(self, path):
+        # Connections move between threads, but only one thread uses a connection at a time
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                               cached_statements=config.DB_STATEMENT_CACHE)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}')
+        conn.execute(f'PRAGMA cache_size=-{int(config.DB_CACHE_KB)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def _reset_if_stale(self):
+        """Drop connections opened for another DB_PATH or inherited across a fork (caller holds _lock)"""
+        if self._path == DB_PATH and self._pid == os.getpid():
+            return
+        if self._pid == os.getpid():
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._path = DB_PATH
+        self._pid = os.getpid()
+
+    def acquire(self):
+        with self._lock:
+            self._reset_if_stale()
+            idle = self._idle
+            try:
+                return idle.get_nowait(), idle
+            except queue.Empty:
+                pass
+            if self._created < self.size:
+                self._created += 1
+                return self._open(self._path), idle
+        return idle.get(timeout=30), idle
+
+    def release(self, conn, idle):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if idle is self._idle:
+                idle.put(conn)
+                return
+        # The pool was reset while this connection was out
+        conn.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn, idle = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn, idle)
+
+    def stats(self):
+        with self._lock:
+            return {'size': self.size, 'open': self._created, 'idle': self._idle.qsize(), 'path': self._path}
+
+
+DB_POOL = ConnectionPool(config.DB_POOL_SIZE)
+
+
+def db_connection():
+    """Borrow a pooled connection: `with db_connection() as conn: ...`"""
+    return DB_POOL.connection()
+
+
+# ==================== SNAPSHOTS ====================
+
+BACKUP_PREFIX = 'srimad_bhagavatam-'
+
+
+def copy_database(source_path, target_path):
+    """Copy a database file with the SQLite backup API (consistent even while it is being written)"""
+    source = sqlite3.connect(f"file:{quote(os.path.abspath(source_path))}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def list_backups(backup_dir=None):
+    """Snapshot files in the backup directory, newest first"""
+    backup_dir = backup_dir or config.BACKUP_DIR
+    if not backup_dir or not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir) if name.startswith(BACKUP_PREFIX) and name.endswith('.db')]
+    # Timestamped names sort in the order they were taken
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def seed_database():
+    """Give a missing DB_PATH the newest backup, or else the snapshot shipped with the app"""
+    if os.path.exists(DB_PATH):
+        return None
+    for source in list_backups() + [config.DB_SEED_PATH]:
+        if not source or not os.path.exists(source) or os.path.abspath(source) == os.path.abspath(DB_PATH):
+            continue
+        tmp_path = f"{DB_PATH}.seed-{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(DB_PATH) or '.', exist_ok=True)
+            copy_database(source, tmp_path)
+            try:
+                # Several workers may start at once; the first link wins and the rest keep its copy
+                os.link(tmp_path, DB_PATH)
+            except FileExistsError:
+                pass
+            except OSError:
+                # No hard links on this filesystem
+                if not os.path.exists(DB_PATH):
+                    os.replace(tmp_path, DB_PATH)
+            print(f"🌱 Seeded {DB_PATH} from {source}")
+            return source
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Could not seed database from {source}: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return None
+
+
+def backup_database(backup_dir=None):
+    """Online snapshot of DB_PATH into the backup directory, keeping the newest config.BACKUP_KEEP"""
+    backup_dir = backup_dir or config.BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    flush_writes()
+    
+    path = os.path.join(backup_dir, f"{BACKUP_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}.db")
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    target = sqlite3.connect(tmp_path)
+    try:
+        with db_connection() as conn:
+            conn.backup(target)
+        # A snapshot is one self-contained file, without -wal/-shm companions
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+    os.replace(tmp_path, path)
+    
+    for old in list_backups(backup_dir)[config.BACKUP_KEEP:]:
+        os.remove(old)
+    return path
+
+
+class BackupScheduler:
+    """Background thread taking a snapshot every config.BACKUP_INTERVAL seconds into config.BACKUP_DIR"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.counters = {'backups': 0, 'skipped': 0, 'errors': 0}
+        self.last_error = None
+
+    def ensure_started(self):
+        if not config.BACKUP_DIR or not config.BACKUP_INTERVAL:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='db-backups', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _newest_age(self):
+        backups = list_backups()
+        return time.time() - os.path.getmtime(backups[0]) if backups else float('inf')
+
+    def _run(self):
+        while True:
+            # Every worker runs this loop; whoever finds the newest snapshot too old takes the next one
+            age = self._newest_age()
+            if age >= config.BACKUP_INTERVAL:
+                try:
+                    path = backup_database()
+                    print(f"💾 Database backed up to {path}")
+                    with self._lock:
+                        self.counters['backups'] += 1
+                    age = 0
+                except Exception as e:
+                    print(f"❌ Database backup failed: {type(e).__name__}: {e}")
+                    with self._lock:
+                        self.counters['errors'] += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                    age = config.BACKUP_INTERVAL - 300
+            else:
+                with self._lock:
+                    self.counters['skipped'] += 1
+            time.sleep(max(30, config.BACKUP_INTERVAL - age))
+
+    def stats(self):
+        backups = list_backups()
+        with self._lock:
+            return {
+                **self.counters,
+                'db_path': DB_PATH,
+                'backup_dir': config.BACKUP_DIR,
+                'interval': config.BACKUP_INTERVAL,
+                'newest': backups[0] if backups else None,
+                'newest_age_seconds': round(self._newest_age()) if backups else None,
+                'last_error': self.last_error
+            }
+
+
+BACKUPS = BackupScheduler()
+
+
 def init_db():
     """Initialize database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS verses (
-                canto INTEGER,
-                chapter INTEGER,
-                verse INTEGER,
-                devanagari_verse TEXT,
-                sanskrit_verse TEXT,
-                word_meanings TEXT,
-                translation TEXT,
-                purport TEXT,
-                PRIMARY KEY (canto, chapter, verse)
-            )
-        """)
-        
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS chapter_meanings (
-                canto INTEGER,
-                chapter INTEGER,
-                video_id TEXT,
-                transcript TEXT,
-                translation TEXT,
-                fetched_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (canto, chapter)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        seed_database()
+        with db_connection() as conn:
+            c = conn.cursor()
+            
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS verses (
+                    canto INTEGER,
+                    chapter INTEGER,
+                    verse INTEGER,
+                    devanagari_verse TEXT,
+                    sanskrit_verse TEXT,
+                    word_meanings TEXT,
+                    translation TEXT,
+                    purport TEXT,
+                    PRIMARY KEY (canto, chapter, verse)
+                )
+            """)
+        
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS chapter_meanings (
+                    canto INTEGER,
+                    chapter INTEGER,
+                    video_id TEXT,
+                    transcript TEXT,
+                    translation TEXT,
+                    fetched_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (canto, chapter)
+                )
+            """)
+        
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_checkpoint (
+                    canto INTEGER,
+                    chapter INTEGER,
+                    status TEXT,
+                    verses INTEGER DEFAULT 0,
+                    attempts INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (canto, chapter)
+                )
+            """)
+        
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS missing_verses (
+                    canto INTEGER,
+                    chapter INTEGER,
+                    verse INTEGER,
+                    reason TEXT,
+                    combined_range TEXT,
+                    expires_at REAL,
+                    PRIMARY KEY (canto, chapter, verse)
+                )
+            """)
+        
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS compression_dicts (
+                    dict_id INTEGER PRIMARY KEY,
+                    column_name TEXT,
+                    dict BLOB,
+                    samples INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+        
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS chapters (
+                    canto INTEGER,
+                    chapter INTEGER,
+                    title TEXT,
+                    verse_count INTEGER,
+                    combined_ranges TEXT,
+                    source TEXT,
+                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (canto, chapter)
+                )
+            """)
+            if 'source' not in [row[1] for row in c.execute('PRAGMA table_info(chapters)')]:
+                c.execute('ALTER TABLE chapters ADD COLUMN source TEXT')
+
+            c.execute("""
+                CREATE TABLE IF NOT EXISTS fetch_leases (
+                    resource TEXT PRIMARY KEY,
+                    owner TEXT,
+                    expires_at REAL
+                )
+            """)
+            
+            conn.commit()
+            _init_search_index(conn)
+            _init_word_index(conn)
+            _init_trigram_index(conn)
         print("✅ Database initialized")
     except Exception as e:
         print(f"❌ Database init error: {e}")
@@ -163,216 +501,2897 @@ def is_devanagari(text):
 #         print(f"❌ Error: {e}")
 #         return None
 
-def fetch_from_vedabase(canto, chapter, verse, retry_count=0):
-    """Fetch verse from vedabase.io with better error handling"""
-    max_retries = 3  # Increased from 2
-    
-    try:
-        url = f"https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/"
-        print(f"🔍 Fetching (attempt {retry_count + 1}/{max_retries + 1}): {url}")
-        
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            page = context.new_page()
-            page.set_default_timeout(90000)  # Increased to 90 seconds
-            
-            try:
-                # Navigate with longer timeout
-                page.goto(url, wait_until='domcontentloaded', timeout=90000)
-                time.sleep(4)  # Increased wait time
-                
-            except PlaywrightTimeout:
-                print("⚠️ Page load timeout")
-                browser.close()
-                
-                if retry_count < max_retries:
-                    print(f"🔄 Retrying... ({retry_count + 1}/{max_retries})")
-                    time.sleep(3)
-                    return fetch_from_vedabase(canto, chapter, verse, retry_count + 1)
-                else:
-                    return None
-            except Exception as e:
-                print(f"⚠️ Navigation error: {e}")
-                browser.close()
-                
-                if retry_count < max_retries:
-                    time.sleep(3)
-                    return fetch_from_vedabase(canto, chapter, verse, retry_count + 1)
-                else:
-                    return None
-            
-            # Rest of the extraction code stays the same
-            full_text = page.inner_text('body')
-            lines = full_text.split('\n')
-            
-            sb_idx = synonyms_idx = translation_idx = purport_idx = -1
-            
-            for i, line in enumerate(lines):
-                line_lower = line.strip().lower()
-                if re.match(r'[śŚ]b \d+\.\d+\.\d+', line.strip(), re.IGNORECASE):
-                    sb_idx = i
-                if line_lower == 'synonyms':
-                    synonyms_idx = i
-                if line_lower == 'translation':
-                    translation_idx = i
-                if line_lower == 'purport':
-                    purport_idx = i
-            
-            devanagari_verse = ""
-            sanskrit_verse = ""
-            word_meanings = ""
-            translation = ""
-            purport = ""
-            
-            if sb_idx > 0 and synonyms_idx > 0:
-                devanagari_lines = []
-                verse_lines = []
-                
-                for i in range(sb_idx + 1, synonyms_idx):
-                    line = lines[i].strip()
-                    if line and not any(skip in line for skip in ['Default View', 'Dual Language']):
-                        if is_devanagari(line):
-                            devanagari_lines.append(line)
-                        elif len(line) > 3:
-                            verse_lines.append(line)
-                
-                devanagari_verse = '\n'.join(devanagari_lines)
-                sanskrit_verse = '\n'.join(verse_lines)
-            
-            if synonyms_idx > 0 and translation_idx > 0:
-                synonym_lines = []
-                for i in range(synonyms_idx + 1, translation_idx):
-                    line = lines[i].strip()
-                    if line and len(line) > 3:
-                        synonym_lines.append(line)
-                word_meanings = ' '.join(synonym_lines)
-            
-            if translation_idx > 0 and purport_idx > 0:
-                translation_lines = []
-                for i in range(translation_idx + 1, purport_idx):
-                    line = lines[i].strip()
-                    if line and len(line) > 3:
-                        translation_lines.append(line)
-                translation = ' '.join(translation_lines)
-            
-            if purport_idx > 0:
-                purport_lines = []
-                for i in range(purport_idx + 1, len(lines)):
-                    line = lines[i].strip()
-                    if any(stop in line for stop in ['Donate', 'Thanks to', 'His Divine Grace', '©']):
-                        break
-                    if re.match(r'^Text \d+$', line):
-                        break
-                    if line and len(line) > 3:
-                        purport_lines.append(line)
-                purport = ' '.join(purport_lines)
-            
-            browser.close()
-            
-            print(f"✅ Extracted successfully")
-            
+# ==================== FETCH PROGRESS ====================
+
+VERSE_SECTIONS = ['devanagari_verse', 'sanskrit_verse', 'word_meanings', 'translation', 'purport']
+
+
+class ProgressHub:
+    """Fan-out of fetch progress events to listeners waiting on a verse"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = {}
+
+    def subscribe(self, canto, chapter, verse):
+        listener = queue.Queue()
+        with self._lock:
+            self._listeners.setdefault((canto, chapter), []).append((verse, listener))
+        return listener
+
+    def unsubscribe(self, canto, chapter, listener):
+        with self._lock:
+            listeners = self._listeners.get((canto, chapter), [])
+            listeners[:] = [entry for entry in listeners if entry[1] is not listener]
+            if not listeners:
+                self._listeners.pop((canto, chapter), None)
+
+    def publish(self, canto, chapter, verse, event, **data):
+        """Send an event to listeners of this verse; verse=None reaches everyone in the chapter"""
+        with self._lock:
+            listeners = list(self._listeners.get((canto, chapter), []))
+        for listened_verse, listener in listeners:
+            if verse is None or listened_verse == verse:
+                listener.put((event, data))
+
+
+FETCH_PROGRESS = ProgressHub()
+
+
+# ==================== RESOURCE BLOCKING ====================
+
+# Rough transfer sizes used to estimate what a blocked request would have cost
+_TYPICAL_RESOURCE_BYTES = {
+    'image': 40000,
+    'media': 500000,
+    'font': 35000,
+    'stylesheet': 25000,
+    'script': 30000,
+    'xhr': 5000,
+    'fetch': 5000,
+    'other': 5000
+}
+
+
+class ResourceBlockStats:
+    """Counters for requests blocked by install_resource_blocking"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.allowed = 0
+            self.blocked_by_type = {}
+            self.blocked_third_party = 0
+            self.bytes_saved_estimate = 0
+
+    def record(self, resource_type, third_party):
+        with self._lock:
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            if third_party:
+                self.blocked_third_party += 1
+            self.bytes_saved_estimate += _TYPICAL_RESOURCE_BYTES.get(resource_type, 5000)
+
+    def record_allowed(self):
+        with self._lock:
+            self.allowed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'blocked': sum(self.blocked_by_type.values()),
+                'blocked_by_type': dict(self.blocked_by_type),
+                'blocked_third_party': self.blocked_third_party,
+                'bytes_saved_estimate': self.bytes_saved_estimate
+            }
+
+
+RESOURCE_BLOCK_STATS = ResourceBlockStats()
+
+
+def _host_allowed(host, allowed_hosts):
+    return any(host == allowed or host.endswith('.' + allowed) for allowed in allowed_hosts)
+
+
+def install_resource_blocking(page, target):
+    """Abort resource types and third-party hosts the text extractors never read"""
+    profile = config.SCRAPE_PROFILES.get(target, {})
+    blocked_types = set(config.BLOCK_RESOURCE_TYPES) - set(profile.get('allow_types', []))
+    allowed_hosts = profile.get('allow_hosts', [target])
+
+    def handle(route):
+        req = route.request
+        resource_type = req.resource_type
+        host = urlparse(req.url).hostname or ''
+        third_party = not _host_allowed(host, allowed_hosts)
+
+        # Never block the page itself, even after a redirect to another host
+        if resource_type != 'document' and (resource_type in blocked_types or third_party):
+            RESOURCE_BLOCK_STATS.record(resource_type, third_party)
+            route.abort()
+        else:
+            RESOURCE_BLOCK_STATS.record_allowed()
+            route.continue_()
+
+    page.route('**/*', handle)
+
+
+# ==================== BROWSER POOL ====================
+
+class BrowserSlot(threading.Thread):
+    """One warm Chromium browser, owned by a single thread (Playwright sync objects are thread-bound)"""
+
+    def __init__(self, pool, slot_id):
+        super().__init__(name=f'browser-slot-{slot_id}', daemon=True)
+        self.pool = pool
+        self.slot_id = slot_id
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.browser_pid = None
+        self.pages_served = 0
+        self.launches = 0
+        self.recycles = 0
+        self.busy = False
+
+    def run(self):
+        try:
+            self.playwright = sync_playwright().start()
+        except Exception as e:
+            print(f"❌ Browser slot {self.slot_id}: Playwright start failed: {e}")
+            self.pool._slot_failed(self, e)
+            return
+
+        while True:
+            job = self.pool._jobs.get()[2]
+            if job is None:
+                break
+
+            fn, target, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self.busy = True
+            page = None
+            try:
+                self._ensure_browser()
+                page = self.context.new_page()
+                page.set_default_timeout(90000)
+                install_resource_blocking(page, target)
+                future.set_result(fn(page))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                if page is not None:
+                    self.pages_served += 1
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+                self.busy = False
+                self._maybe_recycle()
+
+        self._close_browser()
+        try:
+            self.playwright.stop()
+        except Exception:
+            pass
+
+    def _ensure_browser(self):
+        """Launch the browser if missing or unhealthy"""
+        if self.browser is not None and self._healthy():
+            return
+
+        if self.browser is not None:
+            print(f"⚠️ Browser slot {self.slot_id} failed health check, relaunching")
+            self._close_browser()
+
+        with self.pool._launch_lock:
+            before = _child_pids()
+            self.browser = self.playwright.chromium.launch(headless=True)
+            self.browser_pid = _find_browser_pid(before)
+
+        # Lean profile: small viewport, no service workers caching assets behind our route handler
+        self.context = self.browser.new_context(
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            viewport={'width': 800, 'height': 600},
+            service_workers='block'
+        )
+        self.pages_served = 0
+        self.launches += 1
+        print(f"🌐 Browser slot {self.slot_id} launched (launch #{self.launches})")
+
+    def _healthy(self):
+        try:
+            return self.browser.is_connected() and self.context is not None
+        except Exception:
+            return False
+
+    def rss_mb(self):
+        """Resident memory of this browser's process tree, or None if unknown"""
+        if psutil is None or self.browser_pid is None:
+            return None
+        try:
+            proc = psutil.Process(self.browser_pid)
+            total = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def _maybe_recycle(self):
+        if self.browser is None:
+            return
+
+        reason = None
+        if self.pages_served >= config.BROWSER_MAX_PAGES:
+            reason = f"{self.pages_served} pages served"
+        else:
+            rss = self.rss_mb()
+            if rss is not None and rss > config.BROWSER_MAX_RSS_MB:
+                reason = f"RSS {rss:.0f} MB"
+
+        if reason:
+            print(f"♻️ Recycling browser slot {self.slot_id} ({reason})")
+            self.recycles += 1
+            self._close_browser()
+
+    def _close_browser(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+        self.browser = None
+        self.context = None
+        self.browser_pid = None
+
+    def stats(self):
+        rss = self.rss_mb()
+        return {
+            'slot': self.slot_id,
+            'alive': self.is_alive(),
+            'busy': self.busy,
+            'browser_running': self.browser is not None,
+            'pages_since_launch': self.pages_served,
+            'launches': self.launches,
+            'recycles': self.recycles,
+            'rss_mb': round(rss, 1) if rss is not None else None
+        }
+
+
+class BrowserPool:
+    """Fixed set of warm browser slots; fetch jobs are run on whichever slot is free, user jobs first"""
+
+    USER, BACKGROUND, STOP = 0, 1, 2
+
+    def __init__(self, size):
+        self.size = size
+        self._jobs = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._slots = []
+        self._lock = threading.Lock()
+        self._launch_lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        with self._lock:
+            # Started lazily, and again after a fork (gunicorn), since threads don't survive fork
+            if self._pid == os.getpid() and any(s.is_alive() for s in self._slots):
+                return
+            self._jobs = queue.PriorityQueue()
+            self._slots = [BrowserSlot(self, i) for i in range(self.size)]
+            for slot in self._slots:
+                slot.start()
+            self._pid = os.getpid()
+            print(f"🌐 Browser pool started ({self.size} slots)")
+
+    def _slot_failed(self, slot, error):
+        # Fail queued jobs rather than leaving callers waiting when no slot can run them
+        if not any(s.is_alive() and s is not slot for s in self._slots):
+            while True:
+                try:
+                    job = self._jobs.get_nowait()[2]
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[2].set_exception(error)
+
+    def run(self, fn, timeout=None, target='vedabase.io', priority=USER):
+        """Run fn(page) on a pooled browser page and return its result; BACKGROUND jobs wait for queued USER jobs"""
+        self._start()
+        future = Future()
+        self._jobs.put((priority, next(self._order), (fn, target, future)))
+        try:
+            return future.result(timeout=timeout or config.BROWSER_FETCH_TIMEOUT)
+        except FutureTimeout:
+            future.cancel()
+            raise
+
+    def shutdown(self):
+        for _ in self._slots:
+            self._jobs.put((self.STOP, next(self._order), None))
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'queued': self._jobs.qsize(),
+            'psutil': psutil is not None,
+            'slots': [slot.stats() for slot in self._slots]
+        }
+
+
+def _child_pids():
+    if psutil is None:
+        return set()
+    try:
+        return {p.pid for p in psutil.Process().children(recursive=True)}
+    except psutil.Error:
+        return set()
+
+
+def _find_browser_pid(before):
+    """Pick out the Chromium process that appeared since `before`"""
+    if psutil is None:
+        return None
+    new_pids = _child_pids() - before
+    for pid in new_pids:
+        try:
+            proc = psutil.Process(pid)
+            if proc.ppid() not in new_pids and 'chrom' in proc.name().lower():
+                return pid
+        except psutil.Error:
+            pass
+    return None
+
+
+BROWSER_POOL = BrowserPool(config.BROWSER_POOL_SIZE)
+atexit.register(BROWSER_POOL.shutdown)
+
+
+def _is_section_end(line):
+    if any(stop in line for stop in ['Donate', 'Thanks to', 'His Divine Grace', '©']):
+        return True
+    return bool(re.match(r'^Text \d+$', line))
+
+
+def parse_verse_text(full_text):
+    """Split the rendered text of a verse page into its sections"""
+    lines = full_text.split('\n')
+    
+    sb_idx = synonyms_idx = translation_idx = purport_idx = -1
+    
+    for i, line in enumerate(lines):
+        line_lower = line.strip().lower()
+        if re.match(r'[śŚ]b \d+\.\d+\.\d+', line.strip(), re.IGNORECASE):
+            sb_idx = i
+        if line_lower == 'synonyms':
+            synonyms_idx = i
+        if line_lower == 'translation':
+            translation_idx = i
+        if line_lower == 'purport':
+            purport_idx = i
+    
+    devanagari_verse = ""
+    sanskrit_verse = ""
+    word_meanings = ""
+    translation = ""
+    purport = ""
+    
+    if sb_idx > 0 and synonyms_idx > 0:
+        devanagari_lines = []
+        verse_lines = []
+        
+        for i in range(sb_idx + 1, synonyms_idx):
+            line = lines[i].strip()
+            if line and not any(skip in line for skip in ['Default View', 'Dual Language']):
+                if is_devanagari(line):
+                    devanagari_lines.append(line)
+                elif len(line) > 3:
+                    verse_lines.append(line)
+        
+        devanagari_verse = '\n'.join(devanagari_lines)
+        sanskrit_verse = '\n'.join(verse_lines)
+    
+    if synonyms_idx > 0 and translation_idx > 0:
+        synonym_lines = []
+        for i in range(synonyms_idx + 1, translation_idx):
+            line = lines[i].strip()
+            if line and len(line) > 3:
+                synonym_lines.append(line)
+        word_meanings = ' '.join(synonym_lines)
+    
+    if translation_idx > 0:
+        translation_lines = []
+        # Some verses have no purport, so the translation then runs up to the page footer
+        translation_end = purport_idx if purport_idx > translation_idx else len(lines)
+        for i in range(translation_idx + 1, translation_end):
+            line = lines[i].strip()
+            if _is_section_end(line):
+                break
+            if line and len(line) > 3:
+                translation_lines.append(line)
+        translation = ' '.join(translation_lines)
+    
+    if purport_idx > 0:
+        purport_lines = []
+        for i in range(purport_idx + 1, len(lines)):
+            line = lines[i].strip()
+            if _is_section_end(line):
+                break
+            if line and len(line) > 3:
+                purport_lines.append(line)
+        purport = ' '.join(purport_lines)
+    
+    return {
+        'devanagari_verse': devanagari_verse.strip(),
+        'sanskrit_verse': sanskrit_verse.strip(),
+        'word_meanings': word_meanings.strip(),
+        'translation': translation.strip(),
+        'purport': purport.strip(),
+    }
+
+
+class VerseNotFound(Exception):
+    """vedabase.io has no page for this verse (past the chapter end, or only published in a combined range)"""
+
+    def __init__(self, url, combined_range=None):
+        super().__init__(f"No verse page at {url}")
+        self.url = url
+        self.combined_range = combined_range
+
+
+_RANGE_URL_RE = re.compile(r'/(\d+-\d+)/?$')
+
+
+def _check_verse_url(requested_url, final_url, status):
+    """Raise VerseNotFound for a 404 or a redirect onto a combined text that starts at an earlier verse"""
+    if status == 404:
+        raise VerseNotFound(requested_url)
+    match = _RANGE_URL_RE.search(urlparse(final_url).path)
+    if match and final_url.rstrip('/') != requested_url.rstrip('/'):
+        requested_verse = urlparse(requested_url).path.rstrip('/').rsplit('/', 1)[-1]
+        # The first verse of a combined text is that text's page, like parse_chapter_text keys it
+        if match.group(1).split('-')[0] != requested_verse:
+            raise VerseNotFound(requested_url, combined_range=match.group(1))
+
+
+def _with_combined_range(result, final_url):
+    """Mark a verse fetched from a combined-text page with the text's last verse"""
+    match = _RANGE_URL_RE.search(urlparse(final_url).path)
+    if match:
+        result['last_verse'] = int(match.group(1).split('-')[1])
+    return result
+
+
+def _load_page_text(page, url, verse_page=False):
+    """Navigate a pooled page to url and return the rendered body text"""
+    response = page.goto(url, wait_until='domcontentloaded', timeout=90000)
+    if verse_page and response is not None:
+        _check_verse_url(url, page.url, response.status)
+    try:
+        # Let client-side rendering settle, but don't wait longer than the old fixed sleep
+        page.wait_for_load_state('networkidle', timeout=4000)
+    except PlaywrightTimeout:
+        pass
+    return page.inner_text('body')
+
+
+def fetch_from_vedabase(canto, chapter, verse, background=False):
+    """Fetch verse from vedabase.io on a warm pooled browser (background fetches yield to user ones)"""
+    max_retries = 3
+    url = f"https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/"
+    
+    for attempt in range(max_retries + 1):
+        print(f"🔍 Fetching (attempt {attempt + 1}/{max_retries + 1}): {url}")
+        FETCH_PROGRESS.publish(canto, chapter, verse, 'progress', phase='navigate', tier='browser', attempt=attempt + 1)
+        
+        try:
+            full_text, final_url = BROWSER_POOL.run(
+                lambda page: (_load_page_text(page, url, verse_page=True), page.url),
+                priority=BrowserPool.BACKGROUND if background else BrowserPool.USER)
+        except VerseNotFound:
+            # Retrying can't make a missing page appear
+            raise
+        except (PlaywrightTimeout, FutureTimeout):
+            print("⚠️ Page load timeout")
+        except Exception as e:
+            print(f"⚠️ Navigation error: {type(e).__name__}: {e}")
+        else:
+            FETCH_PROGRESS.publish(canto, chapter, verse, 'progress', phase='parse', tier='browser')
+            print(f"✅ Extracted successfully")
+            return _with_combined_range({
+                **parse_verse_text(full_text),
+                'source': 'vedabase.io (fetched)'
+            }, final_url)
+        
+        if attempt < max_retries:
+            print(f"🔄 Retrying... ({attempt + 1}/{max_retries})")
+            time.sleep(3)
+    
+    return None
+
+# ==================== HTTP FETCH TIER ====================
+
+HTTP_HEADERS = {
+    'User-Agent': config.USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.headers.update(HTTP_HEADERS)
+HTTP_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=config.HTTP_POOL_SIZE,
+    max_retries=Retry(total=config.MAX_RETRIES, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+FETCH_TIER_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='fetch-tier')
+
+
+def _element_text(el):
+    return re.sub(r'\s+', ' ', el.get_text()).strip()
+
+
+def parse_verse_html(html):
+    """Extract verse sections from static vedabase HTML (same selectors as fetch_verse_cli.py)"""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    devanagari_lines = []
+    verse_lines = []
+    for el in soup.select('p.verse, div.verse'):
+        for line in el.get_text('\n').split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if is_devanagari(line):
+                devanagari_lines.append(line)
+            else:
+                verse_lines.append(line)
+    
+    synonyms = soup.select_one('p.synonyms, div.synonyms')
+    translation = soup.select_one('p.translation, div.translation')
+    
+    purport = ""
+    purport_elem = soup.select_one('div.purport')
+    if purport_elem:
+        paragraphs = purport_elem.find_all('p') or [purport_elem]
+        purport = ' '.join(_element_text(p) for p in paragraphs if _element_text(p))
+    
+    return {
+        'devanagari_verse': '\n'.join(devanagari_lines),
+        'sanskrit_verse': '\n'.join(verse_lines),
+        'word_meanings': _element_text(synonyms) if synonyms else "",
+        'translation': _element_text(translation) if translation else "",
+        'purport': purport,
+    }
+
+
+def is_complete_verse(result):
+    """A usable verse has its text and a translation; anything less needs the browser"""
+    return bool(result
+                and result.get('translation')
+                and (result.get('sanskrit_verse') or result.get('devanagari_verse')))
+
+
+def fetch_from_vedabase_http(canto, chapter, verse):
+    """Fetch verse with a plain pooled HTTP request (no JavaScript rendering)"""
+    url = f"https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/"
+    
+    try:
+        start = time.time()
+        FETCH_PROGRESS.publish(canto, chapter, verse, 'progress', phase='navigate', tier='http')
+        response = HTTP_SESSION.get(url, timeout=config.REQUEST_TIMEOUT)
+        _check_verse_url(url, response.url, response.status_code)
+        response.raise_for_status()
+        
+        FETCH_PROGRESS.publish(canto, chapter, verse, 'progress', phase='parse', tier='http')
+        result = parse_verse_html(response.content)
+        if not is_complete_verse(result):
+            print(f"⚠️ Static HTML incomplete for {url}")
+            return None
+        
+        print(f"⚡ Fetched over HTTP in {time.time() - start:.2f}s")
+        return _with_combined_range({**result, 'source': 'vedabase.io (fetched)'}, response.url)
+        
+    except VerseNotFound:
+        raise
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ HTTP fetch error: {e}")
+        return None
+    except Exception as e:
+        print(f"⚠️ HTTP parse error: {type(e).__name__}: {e}")
+        return None
+
+
+def _publish_sections(canto, chapter, verse, result):
+    for name in VERSE_SECTIONS:
+        if result.get(name):
+            FETCH_PROGRESS.publish(canto, chapter, verse, 'section', name=name, value=result[name])
+    return result
+
+
+def fetch_verse_tiered(canto, chapter, verse, background=False):
+    """HTTP tier first, browser pool as fallback, hedged after config.FETCH_HEDGE_DELAY
+
+    Raises VerseNotFound as soon as either tier sees that the page doesn't exist.
+    """
+    hedge_delay = config.FETCH_HEDGE_DELAY
+    
+    if hedge_delay is None:
+        result = (fetch_from_vedabase_http(canto, chapter, verse)
+                  or fetch_from_vedabase(canto, chapter, verse, background))
+        return _publish_sections(canto, chapter, verse, result) if result else None
+    
+    pending = {FETCH_TIER_EXECUTOR.submit(fetch_from_vedabase_http, canto, chapter, verse)}
+    browser_started = False
+    
+    while pending:
+        # Until the browser tier is in the race, only wait out the hedge delay
+        done, pending = wait(pending, timeout=None if browser_started else hedge_delay,
+                             return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            result = future.result()
+            if result:
+                return _publish_sections(canto, chapter, verse, result)
+        
+        if not browser_started:
+            if not done:
+                print(f"⏱️ HTTP tier slower than {hedge_delay}s, hedging with browser")
+            browser_started = True
+            pending.add(FETCH_TIER_EXECUTOR.submit(fetch_from_vedabase, canto, chapter, verse, background))
+    
+    return None
+
+
+# ==================== COMPRESSION ====================
+
+COMPRESSED_MAGIC = b'ZSD1'
+
+# Columns the compress tool may rewrite, and their tables
+COMPRESSIBLE_COLUMNS = {
+    'purport': 'verses',
+    'word_meanings': 'verses',
+    'transcript': 'chapter_meanings'
+}
+
+
+class TextCodec:
+    """zstd compression of large text columns with one trained dictionary per column.
+    
+    Compressed values are BLOBs of COMPRESSED_MAGIC + 4-byte dictionary id + zstd frame;
+    anything else is returned unchanged, so plain and compressed rows can coexist.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dicts = None
+        self._latest = {}
+        self._path = None
+        self._local = threading.local()
+
+    def _load(self):
+        with self._lock:
+            if self._dicts is not None and self._path == DB_PATH:
+                return
+            dicts, latest = {}, {}
+            with db_connection() as conn:
+                for dict_id, column, data in conn.execute(
+                        'SELECT dict_id, column_name, dict FROM compression_dicts ORDER BY dict_id'):
+                    dicts[dict_id] = zstandard.ZstdCompressionDict(data)
+                    latest[column] = dict_id
+            self._dicts, self._latest, self._path = dicts, latest, DB_PATH
+            # zstd (de)compressors aren't safe to share between threads
+            self._local = threading.local()
+
+    def reload(self):
+        """Pick up dictionaries added by the compress tool"""
+        with self._lock:
+            self._dicts = None
+
+    def _dictionary(self, dict_id):
+        """The dictionary for dict_id, reloading once in case another process added it since"""
+        self._load()
+        if dict_id not in self._dicts:
+            self.reload()
+            self._load()
+            if dict_id not in self._dicts:
+                raise ValueError(f"Unknown compression dictionary id {dict_id}")
+        return self._dicts[dict_id]
+
+    def _cached(self, kind, dict_id):
+        cache = self._local.__dict__.setdefault(kind, {})
+        if dict_id not in cache:
+            dict_data = self._dictionary(dict_id)
+            if kind == 'compressor':
+                cache[dict_id] = zstandard.ZstdCompressor(level=config.COMPRESS_LEVEL, dict_data=dict_data)
+            else:
+                cache[dict_id] = zstandard.ZstdDecompressor(dict_data=dict_data)
+        return cache[dict_id]
+
+    def has_dictionary(self, column):
+        if zstandard is None:
+            return False
+        self._load()
+        return column in self._latest
+
+    def encode(self, column, text):
+        """Compress text with the column's newest dictionary; short text, or no dictionary, stays plain"""
+        if not text or len(text) < config.COMPRESS_MIN_BYTES or not self.has_dictionary(column):
+            return text
+        dict_id = self._latest[column]
+        frame = self._cached('compressor', dict_id).compress(text.encode('utf-8'))
+        return COMPRESSED_MAGIC + dict_id.to_bytes(4, 'little') + frame
+
+    def decode(self, value):
+        if not isinstance(value, bytes) or value[:4] != COMPRESSED_MAGIC:
+            return value
+        if zstandard is None:
+            raise RuntimeError("Compressed verse text needs the zstandard package")
+        dict_id = int.from_bytes(value[4:8], 'little')
+        return self._cached('decompressor', dict_id).decompress(value[8:]).decode('utf-8')
+
+
+TEXT_CODEC = TextCodec()
+
+
+def _stored_verse_rows(rows):
+    """Verse rows as written to the verses table: large columns compressed when enabled"""
+    if not config.COMPRESS_TEXT:
+        return rows
+    return [(*row[:5], TEXT_CODEC.encode('word_meanings', row[5]), row[6], TEXT_CODEC.encode('purport', row[7]))
+            for row in rows]
+
+
+# ==================== VERSE CACHE ====================
+
+class VerseCache:
+    """LRU verse records with a TTL, bounded by entry count and by bytes of text (config.ENABLE_CACHE)"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return config.ENABLE_CACHE
+
+    @property
+    def generation(self):
+        """Read before querying SQLite and pass to put(), so a save in between isn't overwritten by stale data"""
+        return self._generation
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                self.counters['expired'] += 1
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return dict(entry[2])
+
+    def put(self, key, record, generation):
+        if not self.enabled:
+            return
+        size = sum(len(value.encode('utf-8')) for value in record.values() if isinstance(value, str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + config.CACHE_DURATION, size, dict(record))
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.counters['evictions'] += 1
+
+    def invalidate(self, keys):
+        """Forget verses that were just saved again"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+                    self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': config.CACHE_DURATION,
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else None
+            }
+
+
+VERSE_CACHE = VerseCache(config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES)
+
+# ==================== READ REPLICA ====================
+
+class ReadReplica:
+    """In-memory copy of the verses table for reads (config.READ_REPLICA).
+    
+    Loaded from disk with the backup API, kept current by write-through from the writer,
+    and reloadable to pick up rows written by other processes such as the crawler.
+    Each load is a named shared-cache memory database; readers get their own connection
+    to it per thread, so reads run concurrently and the lock only guards the swap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._conn = None
+        self._uri = None
+        self._generation = 0
+        self._local = threading.local()
+        self._pid = None
+        self._path = None
+        self._pending = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.counters = {'loads': 0, 'reads': 0, 'write_through_rows': 0, 'load_errors': 0}
+
+    def _ready(self):
+        return config.READ_REPLICA and self._conn is not None and self._pid == os.getpid() and self._path == DB_PATH
+
+    @contextlib.contextmanager
+    def connection(self):
+        """The replica connection when it is loaded, otherwise a pooled on-disk connection"""
+        if config.READ_REPLICA and config.READ_REPLICA_REFRESH and self.loaded_at \
+                and time.time() - self.loaded_at > config.READ_REPLICA_REFRESH:
+            self.refresh(wait=False)
+        with self._lock:
+            uri = self._uri if self._ready() else None
+            if uri:
+                self.counters['reads'] += 1
+        if uri:
+            yield self._reader(uri)
+            return
+        with db_connection() as conn:
+            yield conn
+
+    def _reader(self, uri):
+        """This thread's connection to the replica loaded at uri, reopened after a reload"""
+        local = self._local
+        if getattr(local, 'uri', None) != uri:
+            if getattr(local, 'conn', None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(uri, uri=True)
+            # Skip shared-cache table locks, so write-through can't fail a read with "table is locked"
+            local.conn.execute('PRAGMA read_uncommitted = 1')
+            local.uri = uri
+        return local.conn
+
+    def load(self):
+        """Copy the database into memory, keep only verses, then swap it in"""
+        with self._load_lock:
+            start = time.time()
+            path = DB_PATH
+            with self._lock:
+                # Rows committed while the copy is made are replayed onto it before the swap
+                self._pending = []
+            self._generation += 1
+            uri = f'file:replica-{os.getpid()}-{self._generation}?mode=memory&cache=shared'
+            memory = None
+            try:
+                # The memory database lives while any connection to it is open; this one owns it
+                memory = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                with db_connection() as conn:
+                    conn.backup(memory)
+                for (name,) in memory.execute("SELECT name FROM sqlite_master WHERE type='table' "
+                                              "AND sql LIKE 'CREATE VIRTUAL TABLE%'").fetchall():
+                    memory.execute(f'DROP TABLE "{name}"')
+                for (name,) in memory.execute("SELECT name FROM sqlite_master WHERE type='table' "
+                                              "AND name != 'verses' AND name NOT LIKE 'sqlite_%'").fetchall():
+                    memory.execute(f'DROP TABLE "{name}"')
+                memory.commit()
+                memory.execute('VACUUM')
+            except Exception as e:
+                print(f"❌ Read replica load failed: {type(e).__name__}: {e}")
+                if memory is not None:
+                    memory.close()
+                with self._lock:
+                    self._pending = None
+                    self.counters['load_errors'] += 1
+                return False
+            
+            with self._lock:
+                _insert_verse_rows(memory, self._pending)
+                memory.commit()
+                self._pending = None
+                old, self._conn, self._uri = self._conn, memory, uri
+                self._pid, self._path = os.getpid(), path
+                self.loaded_at = time.time()
+                self.load_seconds = round(self.loaded_at - start, 3)
+                self.counters['loads'] += 1
+                if old is not None:
+                    old.close()
+            print(f"📚 Read replica loaded in {self.load_seconds}s")
+            return True
+
+    def refresh(self, wait=True):
+        """Reload from disk; without wait, in the background and only if no load is running"""
+        if wait:
+            return self.load()
+        if not self._load_lock.locked():
+            threading.Thread(target=self.load, daemon=True, name='replica-refresh').start()
+        return None
+
+    def apply(self, stored_rows):
+        """Write-through of rows just committed to disk"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(stored_rows)
+            if self._ready():
+                _insert_verse_rows(self._conn, stored_rows)
+                self._conn.commit()
+                self.counters['write_through_rows'] += len(stored_rows)
+
+    def stats(self):
+        with self._lock:
+            ready = self._ready()
+            verses = memory_bytes = None
+            if ready:
+                verses = self._conn.execute('SELECT count(*) FROM verses').fetchone()[0]
+                memory_bytes = (self._conn.execute('PRAGMA page_count').fetchone()[0] *
+                                self._conn.execute('PRAGMA page_size').fetchone()[0])
+            return {
+                **self.counters,
+                'enabled': config.READ_REPLICA,
+                'ready': ready,
+                'verses': verses,
+                'bytes': memory_bytes,
+                'load_seconds': self.load_seconds,
+                'age_seconds': round(time.time() - self.loaded_at, 1) if self.loaded_at else None
+            }
+
+
+READ_REPLICA = ReadReplica()
+
+# ==================== CORPUS BUNDLE ====================
+
+# Layout (little-endian): header | sorted u32 packed keys | padding to 8 bytes |
+# u64 offsets, one per field plus an end offset, relative to the data | UTF-8 field data.
+# Field j of record i is data[offsets[i * fields + j]:offsets[i * fields + j + 1]].
+BUNDLE_MAGIC = b'SBVB'
+BUNDLE_VERSION = 1
+_BUNDLE_HEADER = struct.Struct('<4sHHI4x')
+
+
+def export_bundle(path):
+    """Write every stored verse to a bundle file and publish it atomically; returns (verses, bytes)"""
+    with db_connection() as conn:
+        rows = conn.execute(f'''SELECT {VERSE_KEY_SQL} AS key, {', '.join(VERSE_SECTIONS)}
+                               FROM verses ORDER BY key''').fetchall()
+    
+    keys = array('I', (row[0] for row in rows))
+    offsets = array('Q')
+    chunks = []
+    position = 0
+    for row in rows:
+        for value in row[1:]:
+            data = (TEXT_CODEC.decode(value) or '').encode('utf-8')
+            offsets.append(position)
+            chunks.append(data)
+            position += len(data)
+    offsets.append(position)
+    if sys.byteorder == 'big':
+        keys.byteswap()
+        offsets.byteswap()
+    
+    header = _BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(VERSE_SECTIONS), len(rows))
+    padding = b'\0' * (-(len(header) + len(keys) * keys.itemsize) % 8)
+    
+    # Write beside the target and rename over it, so readers see the old or the new bundle, never half of one
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(keys.tobytes())
+        f.write(padding)
+        f.write(offsets.tobytes())
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(rows), os.path.getsize(path)
+
+
+class _MappedBundle:
+    """One opened bundle file; text is sliced straight out of the shared mapping"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            # Published bundles are replaced, never rewritten in place: truncating a mapped file would crash readers
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        magic, version, self.fields, self.count = _BUNDLE_HEADER.unpack_from(self.mm, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION or self.fields != len(VERSE_SECTIONS):
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} verse bundle")
+        if sys.byteorder == 'big':
+            raise ValueError("Verse bundles can only be read on little-endian hosts")
+        
+        view = memoryview(self.mm)
+        keys_start = _BUNDLE_HEADER.size
+        offsets_start = keys_start + 4 * self.count + (-(keys_start + 4 * self.count) % 8)
+        data_start = offsets_start + 8 * (self.count * self.fields + 1)
+        self.keys = view[keys_start:keys_start + 4 * self.count].cast('I')
+        self.offsets = view[offsets_start:data_start].cast('Q')
+        self.data = view[data_start:]
+
+    def record(self, key):
+        i = bisect_left(self.keys, key)
+        if i == self.count or self.keys[i] != key:
+            return None
+        base = i * self.fields
+        return {field: str(self.data[self.offsets[base + j]:self.offsets[base + j + 1]], 'utf-8')
+                for j, field in enumerate(VERSE_SECTIONS)}
+
+
+class VerseBundle:
+    """Read-only verses from config.BUNDLE_PATH, swapped in when a new file is published there"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mapped = None
+        self._path = None
+        self._checked_at = 0
+        self.loaded_at = None
+        self.counters = {'hits': 0, 'misses': 0, 'loads': 0, 'load_errors': 0}
+
+    def _current(self):
+        path = config.BUNDLE_PATH
+        if not path:
+            return None
+        now = time.time()
+        if path == self._path and now - self._checked_at < config.BUNDLE_CHECK_INTERVAL:
+            return self._mapped
+        
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Keep serving what is mapped if the file is briefly missing
+                return self._mapped if path == self._path else None
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if path != self._path or self._mapped is None or self._mapped.identity != identity:
+                try:
+                    mapped = _MappedBundle(path)
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"❌ Could not map verse bundle {path}: {e}")
+                    self.counters['load_errors'] += 1
+                    return self._mapped if path == self._path else None
+                # Readers holding the old mapping finish with it; it is unmapped once unreferenced
+                self._mapped, self._path = mapped, path
+                self.loaded_at = now
+                self.counters['loads'] += 1
+                VERSE_PRESENCE.add(mapped.keys)
+                print(f"📦 Mapped verse bundle {path} ({mapped.count} verses)")
+            return self._mapped
+
+    def get(self, canto, chapter, verse):
+        mapped = self._current()
+        if mapped is None or not verse_key_in_range(canto, chapter, verse):
+            return None
+        record = mapped.record(pack_verse_key(canto, chapter, verse))
+        with self._lock:
+            self.counters['hits' if record else 'misses'] += 1
+        if record:
+            record['source'] = 'bundle (cached)'
+        return record
+
+    def stats(self):
+        mapped = self._current()
+        with self._lock:
+            return {
+                **self.counters,
+                'path': config.BUNDLE_PATH,
+                'verses': mapped.count if mapped else None,
+                'bytes': len(mapped.mm) if mapped else None,
+                'age_seconds': round(time.time() - self.loaded_at, 1) if mapped else None
+            }
+
+
+VERSE_BUNDLE = VerseBundle()
+
+# ==================== PRESENCE BITMAP ====================
+
+class PresenceBitmap:
+    """One bit per packed verse key, set when the verse is stored, so routing needs no SQLite query.
+    
+    A clear bit sends a lookup straight to the fetch path, whose lease reads the database on disk
+    before scraping, so a verse saved by another process is found there and its bit set.
+    The bitmap is also rebuilt every config.PRESENCE_REFRESH seconds, by one thread at a time.
+    """
+
+    SIZE = (max(CHAPTERS_PER_CANTO) + 1) << 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._bits = None
+        self._path = None
+        self.built_at = None
+        self.build_seconds = None
+        self.counters = {'builds': 0, 'present': 0, 'absent': 0, 'stale': 0}
+
+    def _stale(self):
+        return self._bits is None or self._path != DB_PATH or \
+            (config.PRESENCE_REFRESH and time.time() - self.built_at > config.PRESENCE_REFRESH)
+
+    def _current(self):
+        if self._stale():
+            with self._build_lock:
+                # Threads that waited here find the bitmap already rebuilt
+                if self._stale():
+                    return self._build()
+        return self._bits
+
+    def build(self):
+        """Set a bit for every verse in the database and in the mapped bundle"""
+        with self._build_lock:
+            return self._build()
+
+    def _build(self):
+        start = time.time()
+        mapped = VERSE_BUNDLE._current()
+        with self._lock:
+            bits = bytearray(self.SIZE // 8)
+            with db_connection() as conn:
+                for (key,) in conn.execute(f'SELECT {VERSE_KEY_SQL} FROM verses'):
+                    if key < self.SIZE:
+                        bits[key >> 3] |= 1 << (key & 7)
+            for key in (mapped.keys if mapped else ()):
+                bits[key >> 3] |= 1 << (key & 7)
+            self._bits, self._path = bits, DB_PATH
+            self.built_at = time.time()
+            self.build_seconds = round(self.built_at - start, 4)
+            self.counters['builds'] += 1
+            return bits
+
+    def add(self, keys):
+        """Mark packed keys as stored (after a commit or a bundle swap)"""
+        with self._lock:
+            if self._bits is None:
+                return
+            for key in keys:
+                if key < self.SIZE:
+                    self._bits[key >> 3] |= 1 << (key & 7)
+
+    def discard(self, canto, chapter, verse):
+        """Clear a bit that turned out to be stale (e.g. after a restore)"""
+        key = pack_verse_key(canto, chapter, verse)
+        with self._lock:
+            if self._bits is not None and verse_key_in_range(canto, chapter, verse):
+                self._bits[key >> 3] &= ~(1 << (key & 7)) & 0xFF
+                self.counters['stale'] += 1
+
+    def contains(self, canto, chapter, verse):
+        if not verse_key_in_range(canto, chapter, verse):
+            return False
+        key = pack_verse_key(canto, chapter, verse)
+        present = bool(self._current()[key >> 3] >> (key & 7) & 1)
+        with self._lock:
+            self.counters['present' if present else 'absent'] += 1
+        return present
+
+    def coverage(self, canto=None):
+        """Stored verses per canto, or per chapter of one canto, counted straight from the bits"""
+        bits = self._current()
+        
+        def count(start_key, span):
+            return int.from_bytes(bits[start_key >> 3:(start_key + span) >> 3], 'little').bit_count()
+        
+        if canto is not None:
+            return [{'chapter': chapter, 'verses': count(pack_verse_key(canto, chapter, 0), 256)}
+                    for chapter in range(1, CHAPTERS_PER_CANTO[canto] + 1)]
+        return [{
+            'canto': c,
+            'verses': count(c << 16, 1 << 16),
+            'chapters_started': sum(1 for chapter in range(1, chapters + 1)
+                                    if count(pack_verse_key(c, chapter, 0), 256)),
+            'chapters': chapters
+        } for c, chapters in CHAPTERS_PER_CANTO.items()]
+
+    def stats(self):
+        bits = self._current()
+        return {
+            **self.counters,
+            'verses': int.from_bytes(bits, 'little').bit_count(),
+            'bytes': len(bits),
+            'build_seconds': self.build_seconds,
+            'age_seconds': round(time.time() - self.built_at, 1)
+        }
+
+
+VERSE_PRESENCE = PresenceBitmap()
+
+
+def get_from_database(canto, chapter, verse, on_disk=False):
+    """Get verse from database (on_disk skips the read replica, to see rows other processes wrote)"""
+    cached = VERSE_CACHE.get((canto, chapter, verse)) or VERSE_BUNDLE.get(canto, chapter, verse)
+    if cached:
+        return cached
+    
+    try:
+        generation = VERSE_CACHE.generation
+        with (db_connection() if on_disk else READ_REPLICA.connection()) as conn:
+            result = conn.execute('''SELECT devanagari_verse, sanskrit_verse, word_meanings, translation, purport
+                                     FROM verses WHERE canto=? AND chapter=? AND verse=?''',
+                                  (canto, chapter, verse)).fetchone()
+        
+        if result:
+            record = {
+                'devanagari_verse': result[0] or "",
+                'sanskrit_verse': result[1] or "",
+                'word_meanings': TEXT_CODEC.decode(result[2]) or "",
+                'translation': result[3] or "",
+                'purport': TEXT_CODEC.decode(result[4]) or "",
+                'source': 'database (cached)'
+            }
+            VERSE_CACHE.put((canto, chapter, verse), record, generation)
+            if verse_key_in_range(canto, chapter, verse):
+                VERSE_PRESENCE.add([pack_verse_key(canto, chapter, verse)])
+            return record
+        return None
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        return None
+
+def get_verses_from_database(canto, chapter, verses, on_disk=False):
+    """Get several verses of one chapter in a single query, as {verse: record}"""
+    found = {}
+    for verse in verses:
+        record = VERSE_CACHE.get((canto, chapter, verse)) or VERSE_BUNDLE.get(canto, chapter, verse)
+        if record:
+            found[verse] = record
+    verses = [verse for verse in verses if verse not in found]
+    if not verses:
+        return found
+    try:
+        generation = VERSE_CACHE.generation
+        placeholders = ','.join('?' * len(verses))
+        with (db_connection() if on_disk else READ_REPLICA.connection()) as conn:
+            rows = conn.execute(f'''SELECT verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport
+                                   FROM verses WHERE canto=? AND chapter=? AND verse IN ({placeholders})''',
+                                (canto, chapter, *verses)).fetchall()
+        
+        for row in rows:
+            found[row[0]] = {
+                'devanagari_verse': row[1] or "",
+                'sanskrit_verse': row[2] or "",
+                'word_meanings': TEXT_CODEC.decode(row[3]) or "",
+                'translation': row[4] or "",
+                'purport': TEXT_CODEC.decode(row[5]) or "",
+                'source': 'database (cached)'
+            }
+            VERSE_CACHE.put((canto, chapter, row[0]), found[row[0]], generation)
+        VERSE_PRESENCE.add(pack_verse_key(canto, chapter, row[0]) for row in rows
+                           if verse_key_in_range(canto, chapter, row[0]))
+        return found
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        return found
+
+# ==================== SANSKRIT FOLDING ====================
+
+# ITRANS spellings that are only unambiguous before lower-casing
+_ITRANS_FOLDS = [('RRi', 'r'), ('RRI', 'r'), ('R^i', 'r'), ('R^I', 'r'),
+                 ('LLi', 'l'), ('LLI', 'l'), ('L^i', 'l'), ('L^I', 'l'),
+                 ('~N', 'n'), ('~n', 'n'), ('GY', 'jn'), ('.n', 'm'), ('.m', 'm'), ('.h', 'h')]
+_ASCII_FOLDS_RE = re.compile(r'aa|ii|uu|sh|x')
+_ASCII_FOLDS = {'aa': 'a', 'ii': 'i', 'uu': 'u', 'sh': 's', 'x': 'ks'}
+_LATIN_MARKS_RE = re.compile(r'[\u0300-\u036f]')
+
+
+def fold_sanskrit(text):
+    """Reduce IAST, Harvard-Kyoto, ITRANS and plain-ASCII spellings to one key: kṛṣṇa, kRSNa, kRRiShNa → krsna"""
+    if not text:
+        return ''
+    for spelling, folded in _ITRANS_FOLDS:
+        text = text.replace(spelling, folded)
+    # Decompose so ā, ṛ, ś, ṣ, ṇ, ṁ, ṃ, ḥ … become a base letter plus a mark we can drop;
+    # lower-casing then also folds the Harvard-Kyoto capitals (A, R, S, N, M, H, z→s below)
+    text = _LATIN_MARKS_RE.sub('', unicodedata.normalize('NFD', text)).lower().replace('z', 's')
+    return _ASCII_FOLDS_RE.sub(lambda m: _ASCII_FOLDS[m.group()], text)
+
+# ==================== FULL-TEXT SEARCH ====================
+
+FTS_AVAILABLE = False
+FTS_COLUMNS = ['translation', 'purport', 'word_meanings', 'sanskrit_verse', 'sanskrit_folded', 'word_meanings_folded']
+
+
+def _init_search_index(conn):
+    """Create the FTS5 index over verses and fill it if it is new"""
+    global FTS_AVAILABLE
+    try:
+        with conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(verses_fts)')]
+            if columns and columns != FTS_COLUMNS:
+                # FTS5 tables can't be altered; an index from an older layout is rebuilt from verses
+                print("🔄 Rebuilding search index")
+                conn.execute('DROP TABLE verses_fts')
+            conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS verses_fts USING fts5(
+                                 {', '.join(FTS_COLUMNS)},
+                                 tokenize='unicode61 remove_diacritics 2'
+                             )''')
+            if conn.execute('SELECT 1 FROM verses_fts LIMIT 1').fetchone() is None:
+                conn.create_function('fold_sanskrit', 1, fold_sanskrit, deterministic=True)
+                conn.create_function('decode_text', 1, TEXT_CODEC.decode, deterministic=True)
+                conn.execute(f'''INSERT INTO verses_fts (rowid, {', '.join(FTS_COLUMNS)})
+                                 SELECT {VERSE_KEY_SQL}, translation, decode_text(purport), decode_text(word_meanings),
+                                        sanskrit_verse, fold_sanskrit(sanskrit_verse),
+                                        fold_sanskrit(decode_text(word_meanings))
+                                 FROM verses''')
+        FTS_AVAILABLE = True
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 still serve verses, just not /search
+        print(f"⚠️ Full-text search unavailable: {e}")
+        FTS_AVAILABLE = False
+
+
+def _index_verse_rows(conn, rows):
+    """Refresh the search index entries for freshly written verse rows"""
+    if not FTS_AVAILABLE:
+        return
+    keys = [(pack_verse_key(*row[:3]),) for row in rows]
+    conn.executemany('DELETE FROM verses_fts WHERE rowid=?', keys)
+    conn.executemany('''INSERT INTO verses_fts
+                        (rowid, sanskrit_verse, word_meanings, translation, purport, sanskrit_folded, word_meanings_folded)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                     [(key, *row[4:8], fold_sanskrit(row[4]), fold_sanskrit(row[5]))
+                      for (key,), row in zip(keys, rows)])
+
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query, quoted word by word so user input can't break the syntax.
+    
+    Every word must match, either as typed in any column or, folded, in the folded Sanskrit columns.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return ''
+    query = '(' + ' '.join(f'"{word}"' for word in words) + ')'
+    folded = re.findall(r'\w+', fold_sanskrit(text))
+    if folded:
+        query += ' OR {sanskrit_folded word_meanings_folded} : (' + ' '.join(f'"{word}"' for word in folded) + ')'
+    return query
+
+
+def search_verses(text, page=1, per_page=20):
+    """BM25-ranked verses matching text, with highlighted snippets"""
+    match = build_match_query(text)
+    if not match:
+        return 0, []
+    
+    with db_connection() as conn:
+        total = conn.execute('SELECT count(*) FROM verses_fts WHERE verses_fts MATCH ?', (match,)).fetchone()[0]
+        # Column weights: translation, purport, word meanings, Sanskrit, then their folded forms.
+        # Snippets come from the readable columns only, in this order of preference.
+        rows = conn.execute('''SELECT rowid, bm25(verses_fts, 4.0, 1.0, 2.0, 2.0, 2.0, 2.0) AS rank,
+                                     snippet(verses_fts, 0, '<mark>', '</mark>', '…', 16),
+                                     snippet(verses_fts, 2, '<mark>', '</mark>', '…', 16),
+                                     snippet(verses_fts, 3, '<mark>', '</mark>', '…', 16),
+                                     snippet(verses_fts, 1, '<mark>', '</mark>', '…', 16)
+                              FROM verses_fts WHERE verses_fts MATCH ?
+                              ORDER BY rank LIMIT ? OFFSET ?''',
+                           (match, per_page, (page - 1) * per_page)).fetchall()
+    
+    results = []
+    for key, rank, *snippets in rows:
+        canto, chapter, verse = unpack_verse_key(key)
+        # A match found only through folding has no highlight; show the Sanskrit it matched
+        snippet = next((s for s in snippets if '<mark>' in s), snippets[2] or snippets[1])
+        results.append({
+            'reference': f"SB {canto}.{chapter}.{verse}",
+            'canto': canto,
+            'chapter': chapter,
+            'verse': verse,
+            'snippet': snippet,
+            'score': round(-rank, 4),
+            'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/'
+        })
+    return total, results
+
+# ==================== WORD INDEX ====================
+
+_GLOSS_SEPARATOR_RE = re.compile(r'\s*[—–]\s*')
+
+
+def normalize_term(term):
+    """Composed, lower-case form so 'Kṛṣṇa' typed or scraped in any form finds the same rows"""
+    return unicodedata.normalize('NFC', term.strip()).lower()
+
+
+def parse_word_meanings(text):
+    """Split 'janma-ādi — creation, etc.; asya — of this' into [(term, gloss), ...]"""
+    entries = []
+    depth = 0
+    start = 0
+    # Split on ';' outside parentheses; glosses like "(of this; that)" stay whole
+    for i, ch in enumerate(text or ''):
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth = max(0, depth - 1)
+        elif ch == ';' and depth == 0:
+            entries.append(text[start:i])
+            start = i + 1
+    entries.append((text or '')[start:])
+    
+    pairs = []
+    for entry in entries:
+        parts = _GLOSS_SEPARATOR_RE.split(entry.strip(), maxsplit=1)
+        if len(parts) != 2 or not parts[0]:
+            continue
+        # Only the delimiters go; a trailing period may end an abbreviation ("creation, etc.")
+        term, gloss = normalize_term(parts[0]), parts[1].strip(' \t\n;')
+        if term and gloss and len(term) <= 60:
+            pairs.append((term, gloss))
+    return pairs
+
+
+WORD_INDEX_COLUMNS = ['canto', 'chapter', 'verse', 'position', 'term', 'term_folded', 'gloss']
+
+
+def _word_rows(canto, chapter, verse, word_meanings):
+    return [(canto, chapter, verse, position, term, fold_sanskrit(term), gloss)
+            for position, (term, gloss) in enumerate(parse_word_meanings(word_meanings))]
+
+
+def _init_word_index(conn):
+    """Create the term → verse table and fill it if it is new"""
+    with conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(verse_words)')]
+        if columns and columns != WORD_INDEX_COLUMNS:
+            # Derived from verses, so an older layout is simply rebuilt
+            conn.execute('DROP TABLE verse_words')
+        # Key columns first: SQLite 3.40's integrity_check wrongly reports NULLs in
+        # NOT NULL columns placed before the key of a WITHOUT ROWID table
+        conn.execute('''CREATE TABLE IF NOT EXISTS verse_words (
+                            canto INTEGER,
+                            chapter INTEGER,
+                            verse INTEGER,
+                            position INTEGER,
+                            term TEXT NOT NULL,
+                            term_folded TEXT NOT NULL,
+                            gloss TEXT,
+                            PRIMARY KEY (canto, chapter, verse, position)
+                        ) WITHOUT ROWID''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_verse_words_term ON verse_words (term_folded, canto, chapter, verse)')
+        
+        if conn.execute('SELECT 1 FROM verse_words LIMIT 1').fetchone() is None:
+            rows = []
+            for canto, chapter, verse, word_meanings in conn.execute(
+                    "SELECT canto, chapter, verse, word_meanings FROM verses WHERE word_meanings != ''"):
+                rows.extend(_word_rows(canto, chapter, verse, TEXT_CODEC.decode(word_meanings)))
+            conn.executemany('INSERT OR REPLACE INTO verse_words VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def _index_verse_words(conn, rows):
+    """Replace the word index entries for freshly written verse rows"""
+    conn.executemany('DELETE FROM verse_words WHERE canto=? AND chapter=? AND verse=?', [row[:3] for row in rows])
+    word_rows = []
+    for row in rows:
+        word_rows.extend(_word_rows(row[0], row[1], row[2], row[5]))
+    conn.executemany('INSERT OR REPLACE INTO verse_words VALUES (?, ?, ?, ?, ?, ?, ?)', word_rows)
+
+
+def lookup_word(term, prefix=False, limit=200):
+    """Every verse where a Sanskrit term is glossed, in canonical order; spelling is folded, so asya, āsya and Asya agree"""
+    term = fold_sanskrit(term.strip())
+    if prefix:
+        # Range scan keeps the prefix search on the term index
+        where, params = 'term_folded >= ? AND term_folded < ?', (term, term + '\U0010ffff')
+    else:
+        where, params = 'term_folded = ?', (term,)
+    
+    with db_connection() as conn:
+        rows = conn.execute(f'''SELECT term, gloss, canto, chapter, verse, position FROM verse_words
+                               WHERE {where} ORDER BY canto, chapter, verse, position LIMIT ?''',
+                            (*params, limit)).fetchall()
+    return [{
+        'term': term,
+        'gloss': gloss,
+        'reference': f"SB {canto}.{chapter}.{verse}",
+        'canto': canto,
+        'chapter': chapter,
+        'verse': verse,
+        'position': position
+    } for term, gloss, canto, chapter, verse, position in rows]
+
+# ==================== FRAGMENT IDENTIFICATION ====================
+
+_NON_LETTER_RE = re.compile(r'[^a-z]+')
+
+
+def verse_letters(text):
+    """Folded Sanskrit with spaces and punctuation dropped, so sandhi splits and line breaks don't matter"""
+    return _NON_LETTER_RE.sub('', fold_sanskrit(text))
+
+
+def trigrams(letters):
+    return {letters[i:i + 3] for i in range(len(letters) - 2)}
+
+
+def _init_trigram_index(conn):
+    """Create the trigram postings for Sanskrit text and fill them if they are new"""
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS verse_trigrams (
+                            gram TEXT NOT NULL,
+                            key INTEGER NOT NULL,
+                            PRIMARY KEY (gram, key)
+                        ) WITHOUT ROWID''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_verse_trigrams_key ON verse_trigrams (key)')
+        
+        if conn.execute('SELECT 1 FROM verse_trigrams LIMIT 1').fetchone() is None:
+            rows = []
+            for canto, chapter, verse, sanskrit_verse in conn.execute(
+                    "SELECT canto, chapter, verse, sanskrit_verse FROM verses WHERE sanskrit_verse != ''"):
+                key = pack_verse_key(canto, chapter, verse)
+                rows.extend((gram, key) for gram in trigrams(verse_letters(sanskrit_verse)))
+            conn.executemany('INSERT OR IGNORE INTO verse_trigrams VALUES (?, ?)', rows)
+
+
+def _index_verse_trigrams(conn, rows):
+    """Replace the trigram postings for freshly written verse rows"""
+    keys = [pack_verse_key(*row[:3]) for row in rows]
+    conn.executemany('DELETE FROM verse_trigrams WHERE key=?', [(key,) for key in keys])
+    postings = []
+    for key, row in zip(keys, rows):
+        postings.extend((gram, key) for gram in trigrams(verse_letters(row[4])))
+    conn.executemany('INSERT OR IGNORE INTO verse_trigrams VALUES (?, ?)', postings)
+
+
+def _best_window_ratio(fragment, letters):
+    """Similarity of the fragment to the best-matching stretch of a verse.
+    
+    Windows are only tried where one of the fragment's trigrams lines up, so this stays cheap.
+    """
+    best = 0.0
+    tried = set()
+    for offset in range(len(fragment) - 2):
+        gram = fragment[offset:offset + 3]
+        start = letters.find(gram)
+        while start != -1:
+            window_start = max(0, start - offset)
+            if window_start not in tried:
+                tried.add(window_start)
+                window = letters[window_start:window_start + len(fragment) + 3]
+                best = max(best, difflib.SequenceMatcher(None, fragment, window, autojunk=False).ratio())
+            start = letters.find(gram, start + 1)
+    return best
+
+
+def identify_verse(fragment, limit=10):
+    """Rank verses whose Sanskrit resembles a remembered, possibly misspelled, fragment"""
+    letters = verse_letters(fragment)
+    grams = trigrams(letters)
+    if not grams:
+        return []
+    
+    # Prune with the postings: only verses sharing enough trigrams are looked at again
+    min_hits = max(1, int(len(grams) * config.IDENTIFY_MIN_GRAM_MATCH))
+    placeholders = ','.join('?' * len(grams))
+    with db_connection() as conn:
+        candidates = conn.execute(f'''SELECT key, count(*) AS hits FROM verse_trigrams
+                                      WHERE gram IN ({placeholders})
+                                      GROUP BY key HAVING hits >= ?
+                                      ORDER BY hits DESC LIMIT ?''',
+                                   (*grams, min_hits, config.IDENTIFY_CANDIDATES)).fetchall()
+        if not candidates:
+            return []
+        hits_by_key = dict(candidates)
+        # Join on (canto, chapter, verse) so each candidate is a primary-key lookup, not a scan
+        wanted = [part for key in hits_by_key for part in unpack_verse_key(key)]
+        texts = conn.execute(f'''WITH wanted(canto, chapter, verse) AS
+                                     (VALUES {','.join(['(?, ?, ?)'] * len(hits_by_key))})
+                                 SELECT v.canto, v.chapter, v.verse, v.sanskrit_verse, v.translation
+                                 FROM wanted w JOIN verses v
+                                   ON v.canto = w.canto AND v.chapter = w.chapter AND v.verse = w.verse''',
+                              wanted).fetchall()
+    
+    results = []
+    for canto, chapter, verse, sanskrit_verse, translation in texts:
+        key = pack_verse_key(canto, chapter, verse)
+        coverage = hits_by_key[key] / len(grams)
+        alignment = _best_window_ratio(letters, verse_letters(sanskrit_verse))
+        results.append({
+            'reference': f"SB {canto}.{chapter}.{verse}",
+            'canto': canto,
+            'chapter': chapter,
+            'verse': verse,
+            'score': round(0.7 * alignment + 0.3 * coverage, 4),
+            'trigram_coverage': round(coverage, 4),
+            'sanskrit_verse': sanskrit_verse,
+            'translation': translation,
+            'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/'
+        })
+    results.sort(key=lambda r: (-r['score'], r['canto'], r['chapter'], r['verse']))
+    return results[:limit]
+
+# ==================== WRITE-BEHIND ====================
+
+def _insert_verse_rows(conn, stored_rows):
+    conn.executemany('''INSERT OR REPLACE INTO verses 
+                        (canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', stored_rows)
+
+
+def _write_verse_rows(conn, rows):
+    """Upsert verse rows inside the caller's transaction; returns the rows as stored"""
+    # The same verse can be queued twice in one batch; the later copy wins, as it would with REPLACE
+    rows = list({tuple(row[:3]): row for row in rows}.values())
+    stored_rows = _stored_verse_rows(rows)
+    _insert_verse_rows(conn, stored_rows)
+    conn.executemany('DELETE FROM missing_verses WHERE canto=? AND chapter=? AND verse=?',
+                     [row[:3] for row in rows])
+    _index_verse_rows(conn, rows)
+    _index_verse_words(conn, rows)
+    _index_verse_trigrams(conn, rows)
+    return stored_rows
+
+
+class VerseWriter:
+    """Background thread that commits queued verse rows in batches, by size or time window"""
+
+    def __init__(self, batch_size, batch_window):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.counters = {'enqueued': 0, 'written': 0, 'batches': 0, 'failed_batches': 0,
+                         'failed_rows': 0, 'largest_batch': 0}
+        self.last_error = None
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='verse-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self._ensure_thread()
+        with self._lock:
+            self.counters['enqueued'] += len(rows)
+        self._queue.put(rows)
+
+    def flush(self, timeout=30):
+        """Block until everything enqueued before this call is committed (or failed)"""
+        self._ensure_thread()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            rows, waiters = [], []
+            deadline = time.monotonic() + self.batch_window
+            
+            # Gather whatever arrives within the window, up to the batch size
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.extend(item)
+                if len(rows) >= self.batch_size or waiters:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            
+            if rows:
+                self._commit(rows)
+            for waiter in waiters:
+                waiter.set()
+
+    def _commit(self, rows):
+        try:
+            with db_connection() as conn, conn:
+                stored_rows = _write_verse_rows(conn, rows)
+            READ_REPLICA.apply(stored_rows)
+            VERSE_PRESENCE.add(pack_verse_key(*row[:3]) for row in rows)
+            VERSE_CACHE.invalidate([tuple(row[:3]) for row in rows])
+            with self._lock:
+                self.counters['written'] += len(rows)
+                self.counters['batches'] += 1
+                self.counters['largest_batch'] = max(self.counters['largest_batch'], len(rows))
+        except Exception as e:
+            print(f"❌ Write-behind batch of {len(rows)} rows failed: {type(e).__name__}: {e}")
+            with self._lock:
+                self.counters['failed_batches'] += 1
+                self.counters['failed_rows'] += len(rows)
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'queued': self._queue.qsize(), 'last_error': self.last_error,
+                    'batch_size': self.batch_size, 'batch_window': self.batch_window}
+
+
+VERSE_WRITER = VerseWriter(config.WRITE_BATCH_SIZE, config.WRITE_BATCH_WINDOW)
+atexit.register(VERSE_WRITER.flush)
+
+
+def flush_writes(timeout=30):
+    """Wait for queued verse saves to reach the database"""
+    return VERSE_WRITER.flush(timeout)
+
+
+def save_to_database(canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport):
+    """Queue a verse for the background writer; returns as soon as it is queued"""
+    VERSE_WRITER.enqueue([(canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport)])
+    return True
+
+# ==================== NEGATIVE CACHE ====================
+
+def get_missing_verse(canto, chapter, verse):
+    """Return the cached (reason, combined_range) for a verse known not to exist, or None"""
+    try:
+        with db_connection() as conn:
+            return conn.execute('''SELECT reason, combined_range FROM missing_verses
+                                   WHERE canto=? AND chapter=? AND verse=? AND expires_at > ?''',
+                                (canto, chapter, verse, time.time())).fetchone()
+    except Exception as e:
+        print(f"❌ Database error: {e}")
+        return None
+
+
+def record_missing_verses(canto, chapter, verses, reason, combined_range=None):
+    """Remember that these verses have no page of their own, for config.NEGATIVE_CACHE_TTL seconds"""
+    expires_at = time.time() + config.NEGATIVE_CACHE_TTL
+    try:
+        with db_connection() as conn, conn:
+            conn.executemany('''INSERT OR REPLACE INTO missing_verses
+                                (canto, chapter, verse, reason, combined_range, expires_at)
+                                VALUES (?, ?, ?, ?, ?, ?)''',
+                             [(canto, chapter, verse, reason, combined_range, expires_at) for verse in verses])
+    except Exception as e:
+        print(f"❌ Negative cache save error: {e}")
+
+
+def clear_missing_verses(canto=None, chapter=None, verse=None):
+    """Invalidate negative cache entries; None matches everything at that level"""
+    with db_connection() as conn, conn:
+        cur = conn.execute('''DELETE FROM missing_verses
+                              WHERE (? IS NULL OR canto=?) AND (? IS NULL OR chapter=?) AND (? IS NULL OR verse=?)''',
+                           (canto, canto, chapter, chapter, verse, verse))
+    return cur.rowcount
+
+
+def missing_verse_error(canto, chapter, verse, reason, combined_range):
+    if reason == 'combined' and combined_range:
+        return (f'SB {canto}.{chapter}.{verse} is published together with other verses as '
+                f'SB {canto}.{chapter}.{combined_range}.')
+    count = CHAPTER_INDEX.verse_count(canto, chapter)
+    if count:
+        return f'SB {canto}.{chapter}.{verse} does not exist; SB {canto}.{chapter} has {count} verses.'
+    return f'SB {canto}.{chapter}.{verse} does not exist on vedabase.io.'
+
+
+def save_verses_bulk(canto, chapter, verses):
+    """Queue many verses of one chapter; the writer commits them together"""
+    VERSE_WRITER.enqueue((canto, chapter, verse, v['devanagari_verse'], v['sanskrit_verse'], v['word_meanings'],
+                          v['translation'], v['purport'])
+                         for verse, v in verses.items())
+    return True
+
+# ==================== CHAPTER INGEST ====================
+
+_VERSE_HEADER_RE = re.compile(r'^(?:[śŚ]B \d+\.\d+\.|Texts? )(\d+)(?:\s*[-–]\s*(\d+))?$', re.IGNORECASE)
+_INGESTED_CHAPTERS = set()
+_FAILED_INGESTS = {}  # (canto, chapter) -> time of the last ingest that parsed nothing
+
+
+def _ingest_recently_failed(canto, chapter):
+    failed_at = _FAILED_INGESTS.get((canto, chapter))
+    return failed_at is not None and time.time() - failed_at < config.CHAPTER_INGEST_RETRY_AFTER
+
+
+def split_chapter_text(full_text):
+    """Split the text of a chapter advanced-view page into (first_verse, last_verse, lines) per verse"""
+    chunks = []
+    for line in full_text.split('\n'):
+        match = _VERSE_HEADER_RE.match(line.strip())
+        if match:
+            first = int(match.group(1))
+            last = int(match.group(2) or first)
+            chunks.append((first, last, []))
+        elif chunks:
+            chunks[-1][2].append(line)
+    return chunks
+
+
+def parse_chapter_text(canto, chapter, full_text):
+    """Parse every verse on a chapter page into {verse: record}; combined texts are keyed by their first verse"""
+    verses = {}
+    for first, last, lines in split_chapter_text(full_text):
+        label = f"{first}-{last}" if last != first else str(first)
+        # parse_verse_text locates sections relative to an "ŚB c.c.v" line after the first line
+        record = parse_verse_text('\n'.join(['', f'ŚB {canto}.{chapter}.{label}'] + lines))
+        if is_complete_verse(record) and first not in verses:
+            if last != first:
+                record['last_verse'] = last
+            verses[first] = record
+    return verses
+
+
+# Section blocks of a vedabase advanced-view page, and the record field each one fills
+_AV_SECTIONS = {
+    'av-devanagari': 'devanagari_verse',
+    'av-verse_text': 'sanskrit_verse',
+    'av-synonyms': 'word_meanings',
+    'av-translation': 'translation',
+    'av-purport': 'purport'
+}
+_LINE_SECTIONS = {'devanagari_verse', 'sanskrit_verse'}
+
+
+def _av_section_text(section, keep_lines):
+    """Text of one av-* block without its heading; inline elements are joined, as the browser renders them"""
+    blocks = []
+    for child in section.children:
+        if getattr(child, 'name', None) in ('h2', 'h3'):
+            continue
+        if not hasattr(child, 'find_all'):
+            blocks.append(str(child))
+            continue
+        # Paragraphs are the innermost p/div blocks; anything inside them is inline
+        leaves = [el for el in child.find_all(['p', 'div']) if not el.find(['p', 'div'])] or [child]
+        blocks.extend(el.get_text() for el in leaves)
+    if keep_lines:
+        return '\n'.join(line.strip() for block in blocks for line in block.split('\n') if line.strip())
+    return ' '.join(text for text in (re.sub(r'\s+', ' ', block).strip() for block in blocks) if text)
+
+
+def parse_chapter_html(canto, chapter, html):
+    """Parse every verse of a static chapter page by its av-* section blocks, like parse_chapter_text"""
+    soup = BeautifulSoup(html, 'lxml')
+    for br in soup.find_all('br'):
+        br.replace_with('\n')
+    
+    chunks = []
+    for el in soup.find_all(['h1', 'h2', 'h3', 'div']):
+        if el.name != 'div':
+            match = _VERSE_HEADER_RE.match(_element_text(el))
+            if match:
+                first = int(match.group(1))
+                chunks.append((first, int(match.group(2) or first), {}))
+            continue
+        field = next((_AV_SECTIONS[c] for c in el.get('class', []) if c in _AV_SECTIONS), None)
+        if field and chunks:
+            chunks[-1][2][field] = _av_section_text(el, keep_lines=field in _LINE_SECTIONS)
+    
+    verses = {}
+    for first, last, sections in chunks:
+        record = {field: sections.get(field, '') for field in _AV_SECTIONS.values()}
+        if is_complete_verse(record) and first not in verses:
+            if last != first:
+                record['last_verse'] = last
+            verses[first] = record
+    return verses
+
+
+def _chapter_page_html_http(url):
+    try:
+        response = HTTP_SESSION.get(url, timeout=config.REQUEST_TIMEOUT * 3)
+        response.raise_for_status()
+        return response.content
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Chapter HTTP fetch error: {e}")
+        return b""
+
+
+def ingest_chapter(canto, chapter, use_browser=True):
+    """Load a whole chapter from its advanced-view page and store every verse in one transaction"""
+    url = f"https://vedabase.io/en/library/sb/{canto}/{chapter}/advanced-view/"
+    print(f"📚 Ingesting chapter {canto}.{chapter}: {url}")
+    FETCH_PROGRESS.publish(canto, chapter, None, 'progress', phase='navigate', tier='chapter')
+    start = time.time()
+    
+    # Static HTML is parsed by section; flattening it to text splits inline words onto their own lines
+    verses = parse_chapter_html(canto, chapter, _chapter_page_html_http(url))
+    
+    if not verses and use_browser:
+        print("⚠️ Static chapter page incomplete, loading in browser")
+        try:
+            full_text = BROWSER_POOL.run(lambda page: _load_page_text(page, url))
+            verses = parse_chapter_text(canto, chapter, full_text)
+        except Exception as e:
+            print(f"⚠️ Chapter browser fetch error: {type(e).__name__}: {e}")
+    
+    if not verses:
+        print(f"❌ No verses parsed for chapter {canto}.{chapter}")
+        _FAILED_INGESTS[(canto, chapter)] = time.time()
+        return {}
+    
+    save_verses_bulk(canto, chapter, verses)
+    _INGESTED_CHAPTERS.add((canto, chapter))
+    _FAILED_INGESTS.pop((canto, chapter), None)
+    
+    last_verse = max(record.get('last_verse', v) for v, record in verses.items())
+    PREFETCHER.learn_chapter_end(canto, chapter, last_verse)
+    CHAPTER_INDEX.learn(canto, chapter, last_verse,
+                        [(v, record['last_verse']) for v, record in sorted(verses.items()) if 'last_verse' in record])
+    
+    # Later verses of a combined text (e.g. 3 in 2-3) have no page of their own
+    for first, record in verses.items():
+        last = record.get('last_verse', first)
+        if last > first:
+            record_missing_verses(canto, chapter, range(first + 1, last + 1), 'combined', f"{first}-{last}")
+    print(f"✅ Ingested {len(verses)} verses of {canto}.{chapter} in {time.time() - start:.1f}s")
+    
+    return {verse: {**record, 'source': 'vedabase.io (chapter ingest)'} for verse, record in verses.items()}
+
+# ==================== TABLE OF CONTENTS ====================
+
+_CHAPTER_LINK_RE = re.compile(r'^/en/library/sb/(\d+)/(\d+)/?$')
+_TEXT_LINK_RE = re.compile(r'^/en/library/sb/(\d+)/(\d+)/(\d+)(?:-(\d+))?/?$')
+_CHAPTER_PREFIX_RE = re.compile(r'^chapter\s+[\w-]+\s*[:.–—-]?\s*', re.IGNORECASE)
+
+
+def _index_page_links(url):
+    """(path, text) of every link on a vedabase index page"""
+    response = HTTP_SESSION.get(url, timeout=config.REQUEST_TIMEOUT * 3)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.content, 'lxml')
+    return [(urlparse(a['href']).path, a.get_text(' ', strip=True)) for a in soup.find_all('a', href=True)]
+
+
+def parse_canto_index(canto, links):
+    """{chapter: title} from the links on a canto index page"""
+    titles = {}
+    for path, text in links:
+        match = _CHAPTER_LINK_RE.match(path)
+        if match and int(match.group(1)) == canto:
+            title = _CHAPTER_PREFIX_RE.sub('', text).strip()
+            chapter = int(match.group(2))
+            # Pages link each chapter more than once (e.g. "Next chapter"); keep the fullest text
+            titles[chapter] = max(titles.get(chapter) or '', title, key=len) or None
+    return titles
+
+
+def parse_chapter_index(canto, chapter, links):
+    """(verse_count, [(first, last), ...] combined texts) from the links on a chapter index page"""
+    texts = {}
+    for path, _ in links:
+        match = _TEXT_LINK_RE.match(path)
+        if match and (int(match.group(1)), int(match.group(2))) == (canto, chapter):
+            first = int(match.group(3))
+            texts[first] = max(texts.get(first, first), int(match.group(4) or first))
+    if not texts:
+        return None, []
+    return max(texts.values()), sorted((first, last) for first, last in texts.items() if last > first)
+
+
+def index_canto(canto, pause=None, force=False):
+    """Fill the chapters table for one canto from vedabase's canto and chapter index pages.
+
+    Chapters already indexed are skipped unless force is set; pause() is called before each request.
+    Returns the number of chapters indexed.
+    """
+    if pause:
+        pause()
+    titles = parse_canto_index(canto, _index_page_links(f"https://vedabase.io/en/library/sb/{canto}/"))
+    titles = {chapter: title for chapter, title in titles.items() if chapter <= CHAPTERS_PER_CANTO[canto]}
+    print(f"📖 Canto {canto}: {len(titles)} chapters listed")
+
+    rows = []
+    for chapter in range(1, CHAPTERS_PER_CANTO[canto] + 1):
+        known = CHAPTER_INDEX.get(canto, chapter)
+        if known and known['verse_count'] and not force:
+            # Chapters learned from an ingest still need the title from the canto page
+            if titles.get(chapter) and not known['title']:
+                rows.append((canto, chapter, titles[chapter], known['verse_count'], known['combined']))
+            continue
+        if pause:
+            pause()
+        try:
+            verse_count, combined = parse_chapter_index(
+                canto, chapter, _index_page_links(f"https://vedabase.io/en/library/sb/{canto}/{chapter}/"))
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Chapter index fetch error for SB {canto}.{chapter}: {e}")
+            continue
+        if not verse_count:
+            print(f"⚠️ No verses listed for SB {canto}.{chapter}")
+            continue
+        rows.append((canto, chapter, titles.get(chapter), verse_count, combined))
+        for first, last in combined:
+            record_missing_verses(canto, chapter, range(first + 1, last + 1), 'combined', f"{first}-{last}")
+
+    CHAPTER_INDEX.store(rows)
+    print(f"✅ Indexed {len(rows)} chapters of canto {canto}")
+    return len(rows)
+
+
+class ChapterIndex:
+    """Titles, verse counts and combined texts per chapter, read from the chapters table.
+
+    The whole table is a few hundred rows, so it is held in memory and every bounds check and
+    prev/next step is a dict lookup. Only counts read from the index pages (source 'index') are
+    enforced; a count seen on an ingested chapter page is kept as learned_count, a hint only.
+    The copy is reloaded every config.TOC_REFRESH seconds to see other processes' updates.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chapters = None
+        self._path = None
+        self.loaded_at = None
+
+    def _current(self):
+        if self._chapters is None or self._path != DB_PATH or \
+                (config.TOC_REFRESH and time.time() - self.loaded_at > config.TOC_REFRESH):
+            return self.reload()
+        return self._chapters
+
+    def reload(self):
+        chapters = {}
+        with db_connection() as conn:
+            for canto, chapter, title, verse_count, combined, source in conn.execute(
+                    'SELECT canto, chapter, title, verse_count, combined_ranges, source FROM chapters'):
+                ranges = [tuple(map(int, r.split('-'))) for r in (combined or '').split(',') if r]
+                indexed = source == 'index'
+                chapters[(canto, chapter)] = {'title': title, 'combined': ranges,
+                                              'verse_count': verse_count if indexed else None,
+                                              'learned_count': None if indexed else verse_count}
+        with self._lock:
+            self._chapters, self._path = chapters, DB_PATH
+            self.loaded_at = time.time()
+        return chapters
+
+    def store(self, rows, source='index'):
+        """Upsert (canto, chapter, title, verse_count, combined) rows; a missing title keeps the stored one"""
+        if not rows:
+            return
+        with db_connection() as conn, conn:
+            conn.executemany('''INSERT INTO chapters (canto, chapter, title, verse_count, combined_ranges, source,
+                                                     fetched_at)
+                                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                                ON CONFLICT(canto, chapter) DO UPDATE SET
+                                    title=coalesce(excluded.title, title), verse_count=excluded.verse_count,
+                                    combined_ranges=excluded.combined_ranges, source=excluded.source,
+                                    fetched_at=CURRENT_TIMESTAMP''',
+                             [(canto, chapter, title, verse_count, ','.join(f"{a}-{b}" for a, b in combined), source)
+                              for canto, chapter, title, verse_count, combined in rows])
+        self.reload()
+
+    def learn(self, canto, chapter, verse_count, combined):
+        """Record what an ingested chapter page showed, unless the chapter is indexed.
+
+        The page may not have parsed in full, so the count is stored as a hint and never rejects verses.
+        """
+        known = self.get(canto, chapter)
+        if not (known and known['verse_count']):
+            self.store([(canto, chapter, None, verse_count, combined)], source='ingest')
+
+    def indexed(self, canto):
+        """Whether every chapter of the canto has a count from the index pages"""
+        return all(self.verse_count(canto, chapter) for chapter in range(1, CHAPTERS_PER_CANTO[canto] + 1))
+
+    def get(self, canto, chapter):
+        return self._current().get((canto, chapter))
+
+    def verse_count(self, canto, chapter):
+        info = self.get(canto, chapter)
+        return info['verse_count'] if info else None
+
+    def text_starts(self, canto, chapter):
+        """Verses that open a text (the page a reader lands on), or None if the chapter isn't indexed"""
+        info = self.get(canto, chapter)
+        if not (info and info['verse_count']):
+            return None
+        inner = {v for first, last in info['combined'] for v in range(first + 1, last + 1)}
+        return [v for v in range(1, info['verse_count'] + 1) if v not in inner]
+
+    def text_range(self, canto, chapter, verse):
+        """(first, last) of the text containing a verse"""
+        info = self.get(canto, chapter)
+        for first, last in (info['combined'] if info else ()):
+            if first <= verse <= last:
+                return first, last
+        return verse, verse
+
+    def check(self, canto, chapter, verse):
+        """(reason, combined_range) like the negative cache when a verse can't exist, else None"""
+        if canto not in CHAPTERS_PER_CANTO or not 1 <= chapter <= CHAPTERS_PER_CANTO[canto] or verse < 1:
+            return ('not_found', None)
+        count = self.verse_count(canto, chapter)
+        if count and verse > count:
+            return ('not_found', None)
+        first, last = self.text_range(canto, chapter, verse)
+        if first != verse:
+            return ('combined', f"{first}-{last}")
+        return None
+
+    def next_text(self, canto, chapter, verse):
+        """(canto, chapter, verse) of the following text, crossing chapters and cantos; None if unknown"""
+        starts = self.text_starts(canto, chapter)
+        if starts is None:
+            return None
+        last = self.text_range(canto, chapter, verse)[1]
+        following = [v for v in starts if v > last]
+        if following:
+            return (canto, chapter, following[0])
+        if chapter < CHAPTERS_PER_CANTO[canto]:
+            return (canto, chapter + 1, 1)
+        if canto + 1 in CHAPTERS_PER_CANTO:
+            return (canto + 1, 1, 1)
+        return None
+
+    def previous_text(self, canto, chapter, verse):
+        """(canto, chapter, verse) of the preceding text, crossing chapters and cantos; None if unknown"""
+        first = self.text_range(canto, chapter, verse)[0]
+        if first > 1:
+            starts = self.text_starts(canto, chapter)
+            if starts is None:
+                return None
+            return (canto, chapter, max(v for v in starts if v < first))
+        if chapter > 1:
+            previous = (canto, chapter - 1)
+        elif canto - 1 in CHAPTERS_PER_CANTO:
+            previous = (canto - 1, CHAPTERS_PER_CANTO[canto - 1])
+        else:
+            return None
+        starts = self.text_starts(*previous)
+        return (*previous, starts[-1]) if starts else None
+
+    def navigation(self, canto, chapter, verse):
+        """Prev/next references for a verse response; either is None when unknown or at the ends"""
+        def ref(key):
+            return {'canto': key[0], 'chapter': key[1], 'verse': key[2],
+                    'reference': f"SB {key[0]}.{key[1]}.{key[2]}"} if key else None
+
+        first, last = self.text_range(canto, chapter, verse)
+        info = self.get(canto, chapter)
+        return {
+            'previous': ref(self.previous_text(canto, chapter, verse)),
+            'next': ref(self.next_text(canto, chapter, verse)),
+            'text': f"{first}-{last}" if last > first else str(first),
+            'chapter_title': info['title'] if info else None,
+            'chapter_verses': info['verse_count'] if info else None
+        }
+
+    def toc(self, canto=None):
+        """Chapters of one canto, or a summary of every canto"""
+        chapters = self._current()
+        unknown = {'title': None, 'verse_count': None, 'learned_count': None, 'combined': []}
+        if canto is not None:
+            rows = []
+            for chapter in range(1, CHAPTERS_PER_CANTO[canto] + 1):
+                info = chapters.get((canto, chapter), unknown)
+                rows.append({'chapter': chapter, 'title': info['title'], 'verse_count': info['verse_count'],
+                             'learned_count': info['learned_count'],
+                             'combined': [f"{a}-{b}" for a, b in info['combined']]})
+            return rows
+        rows = []
+        for c, count in CHAPTERS_PER_CANTO.items():
+            counts = [chapters.get((c, chapter), unknown)['verse_count'] for chapter in range(1, count + 1)]
+            rows.append({'canto': c, 'chapters': count, 'chapters_indexed': sum(1 for n in counts if n),
+                         'verses': sum(n or 0 for n in counts)})
+        return rows
+
+    def stats(self):
+        chapters = self._current()
+        return {
+            'chapters': len(chapters),
+            'titled': sum(1 for info in chapters.values() if info['title']),
+            'learned_only': sum(1 for info in chapters.values() if not info['verse_count']),
+            'verses': sum(info['verse_count'] or 0 for info in chapters.values())
+        }
+
+
+CHAPTER_INDEX = ChapterIndex()
+
+# ==================== REQUEST COALESCING ====================
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result or error"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            print(f"🔗 Joining in-flight fetch for {key}")
+            return call.result()
+        
+        try:
+            result = fn(*args)
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
             return {
-                'devanagari_verse': devanagari_verse.strip(),
-                'sanskrit_verse': sanskrit_verse.strip(),
-                'word_meanings': word_meanings.strip(),
-                'translation': translation.strip(),
-                'purport': purport.strip(),
-                'source': 'vedabase.io (fetched)'
+                'in_flight': len(self._calls),
+                'fetches_executed': self.executed,
+                'fetches_saved': self.coalesced
             }
-            
-    except Exception as e:
-        print(f"❌ Error: {type(e).__name__}: {e}")
+
+
+VERSE_FLIGHTS = SingleFlight()
+
+
+# ==================== CROSS-WORKER LEASES ====================
+
+class LeaseStats:
+    """Counters for cross-worker fetch leases"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.claimed = 0
+        self.waited = 0
+        self.served_by_other_worker = 0
+        self.taken_over = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'claimed': self.claimed,
+                'waited': self.waited,
+                'served_by_other_worker': self.served_by_other_worker,
+                'taken_over': self.taken_over
+            }
+
+
+LEASE_STATS = LeaseStats()
+
+
+class FetchLease:
+    """A row in fetch_leases marking that this worker is fetching a resource; renewed until released"""
+
+    def __init__(self, resource, owner):
+        self.resource = resource
+        self.owner = owner
+        self._released = threading.Event()
+        self._keeper = threading.Thread(target=self._renew_loop, name=f'lease-{resource}', daemon=True)
+
+    @classmethod
+    def claim(cls, resource):
+        """Take the lease if nobody holds it or the holder's lease expired; None otherwise"""
+        owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        now = time.time()
+        with db_connection() as conn, conn:
+            cur = conn.execute('''INSERT INTO fetch_leases (resource, owner, expires_at) VALUES (?, ?, ?)
+                                  ON CONFLICT(resource) DO UPDATE SET
+                                      owner=excluded.owner, expires_at=excluded.expires_at
+                                  WHERE fetch_leases.expires_at < ?''',
+                               (resource, owner, now + config.FETCH_LEASE_TTL, now))
+        if cur.rowcount != 1:
+            return None
         
-        if retry_count < max_retries:
-            print(f"🔄 Retrying due to error...")
-            time.sleep(3)
-            return fetch_from_vedabase(canto, chapter, verse, retry_count + 1)
+        LEASE_STATS.incr('claimed')
+        lease = cls(resource, owner)
+        lease._keeper.start()
+        return lease
+
+    def _renew_loop(self):
+        while not self._released.wait(config.FETCH_LEASE_TTL / 3):
+            try:
+                with db_connection() as conn, conn:
+                    conn.execute('UPDATE fetch_leases SET expires_at=? WHERE resource=? AND owner=?',
+                                 (time.time() + config.FETCH_LEASE_TTL, self.resource, self.owner))
+            except sqlite3.Error as e:
+                print(f"⚠️ Lease renew error for {self.resource}: {e}")
+
+    def release(self):
+        self._released.set()
+        try:
+            with db_connection() as conn, conn:
+                conn.execute('DELETE FROM fetch_leases WHERE resource=? AND owner=?', (self.resource, self.owner))
+        except sqlite3.Error as e:
+            print(f"⚠️ Lease release error for {self.resource}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _lease_state(resource):
+    with db_connection() as conn:
+        row = conn.execute('SELECT expires_at FROM fetch_leases WHERE resource=?', (resource,)).fetchone()
+    if row is None:
+        return 'released'
+    return 'expired' if row[0] < time.time() else 'held'
+
+
+def run_under_lease(resource, ready, work):
+    """Run work() holding the cross-worker lease on resource; while another worker holds it, poll ready() instead"""
+    while True:
+        lease = FetchLease.claim(resource)
+        if lease:
+            with lease:
+                # Another worker may have finished between our miss and the claim
+                result = ready() or work()
+                # Waiting workers poll the database, so the rows must land before the lease is released
+                flush_writes()
+                return result
         
-        return None
+        print(f"⏳ Another worker is fetching {resource}, waiting for it")
+        LEASE_STATS.incr('waited')
+        state = 'held'
+        while state == 'held':
+            time.sleep(config.FETCH_LEASE_POLL_INTERVAL)
+            value = ready()
+            if value:
+                LEASE_STATS.incr('served_by_other_worker')
+                return value
+            state = _lease_state(resource)
+        
+        if state == 'released':
+            # The holder finished without producing a result; one last look, then give up
+            return ready()
+        
+        print(f"⚠️ Lease on {resource} expired, taking over")
+        LEASE_STATS.incr('taken_over')
 
 
-def get_from_database(canto, chapter, verse):
-    """Get verse from database"""
+def fetch_and_store_verse(canto, chapter, verse, background=False):
+    """Scrape a verse that isn't in the database and save it, unless another worker already is"""
+    return run_under_lease(f"verse:{canto}.{chapter}.{verse}",
+                           lambda: get_from_database(canto, chapter, verse, on_disk=True),
+                           lambda: _scrape_and_store_verse(canto, chapter, verse, background))
+
+
+def _ingest_chapter_for_verse(canto, chapter, verse):
+    def ready():
+        record = get_from_database(canto, chapter, verse, on_disk=True)
+        return {verse: record} if record else None
+    
+    return run_under_lease(f"chapter:{canto}.{chapter}", ready,
+                           lambda: ingest_chapter(canto, chapter, use_browser=False)) or {}
+
+
+def _scrape_and_store_verse(canto, chapter, verse, background=False):
+    # Warm the whole chapter once, since readers usually continue through it
+    # A chapter page that didn't parse recently is skipped, so each miss doesn't download it again
+    if config.CHAPTER_INGEST_ON_MISS and (canto, chapter) not in _INGESTED_CHAPTERS \
+            and not _ingest_recently_failed(canto, chapter):
+        chapter_verses = VERSE_FLIGHTS.do(('chapter', canto, chapter), _ingest_chapter_for_verse, canto, chapter, verse)
+        if verse in chapter_verses:
+            return chapter_verses[verse]
+        # A coalesced ingest may have been answered for a different verse of the chapter
+        record = get_from_database(canto, chapter, verse)
+        if record:
+            return record
+        # The chapter page may have shown this verse to be part of a combined text
+        if get_missing_verse(canto, chapter, verse):
+            return None
+    
+    print(f"⏳ Not in database, fetching from web...")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''SELECT devanagari_verse, sanskrit_verse, word_meanings, translation, purport
-                     FROM verses WHERE canto=? AND chapter=? AND verse=?''',
-                  (canto, chapter, verse))
-        result = c.fetchone()
-        conn.close()
-        
-        if result:
+        web_result = fetch_verse_tiered(canto, chapter, verse, background)
+    except VerseNotFound as e:
+        print(f"🚫 {e}")
+        reason = 'combined' if e.combined_range else 'not_found'
+        record_missing_verses(canto, chapter, [verse], reason, e.combined_range)
+        return None
+    
+    if web_result:
+        # Save to database for next time
+        FETCH_PROGRESS.publish(canto, chapter, verse, 'progress', phase='save')
+        save_to_database(canto, chapter, verse, web_result['devanagari_verse'], 
+                        web_result['sanskrit_verse'], web_result['word_meanings'],
+                        web_result['translation'], web_result['purport'])
+        last = web_result.get('last_verse', verse)
+        if last > verse:
+            record_missing_verses(canto, chapter, range(verse + 1, last + 1), 'combined', f"{verse}-{last}")
+    
+    return web_result
+
+
+def _missing_response(canto, chapter, verse, missing):
+    return {'success': False, 'missing': True, 'combined_range': missing[1],
+            'error': missing_verse_error(canto, chapter, verse, *missing)}
+
+
+def lookup_verse(canto, chapter, verse):
+    """Answer from the database or the negative cache without scraping; None on a miss"""
+    present = VERSE_PRESENCE.contains(canto, chapter, verse)
+    if not present:
+        # Verses outside the table of contents, or inside a combined text, are answered without a query
+        impossible = CHAPTER_INDEX.check(canto, chapter, verse)
+        if impossible:
+            print(f"🚫 Not in the table of contents ({impossible[0]})")
+            return _missing_response(canto, chapter, verse, impossible)
+    
+    # A clear bit skips the query; the fetch lease reads the disk before scraping, which finds
+    # verses another process stored since the last rebuild
+    if present:
+        db_result = get_from_database(canto, chapter, verse)
+        if db_result:
+            print(f"✅ Found in database (instant)")
             return {
-                'devanagari_verse': result[0] or "",
-                'sanskrit_verse': result[1] or "",
-                'word_meanings': result[2] or "",
-                'translation': result[3] or "",
-                'purport': result[4] or "",
-                'source': 'database (cached)'
+                'success': True,
+                'reference': f"SB {canto}.{chapter}.{verse}",
+                **db_result,
+                'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/',
+                'navigation': CHAPTER_INDEX.navigation(canto, chapter, verse)
             }
-        return None
-    except Exception as e:
-        print(f"❌ Database error: {e}")
-        return None
+        VERSE_PRESENCE.discard(canto, chapter, verse)
+    
+    # Known-missing verses fail fast instead of running every fetch attempt again
+    missing = get_missing_verse(canto, chapter, verse)
+    if missing:
+        print(f"🚫 Known missing ({missing[0]})")
+        return _missing_response(canto, chapter, verse, missing)
+    
+    return None
 
-def save_to_database(canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport):
-    """Save to database"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''INSERT OR REPLACE INTO verses 
-                     (canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, translation, purport))
-        conn.commit()
-        conn.close()
-        return True
-    except:
-        return False
 
 def fetch_verse_hybrid(canto, chapter, verse):
     """Hybrid approach - optimized"""
     verse_ref = f"SB {canto}.{chapter}.{verse}"
     
     print(f"\n📥 Request: {verse_ref}")
+    PREFETCHER.note_request(canto, chapter, verse)
     
-    # Check database first (fast path)
-    db_result = get_from_database(canto, chapter, verse)
-    if db_result:
-        print(f"✅ Found in database (instant)")
-        return {
-            'success': True,
-            'reference': verse_ref,
-            **db_result,
-            'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/'
-        }
+    cached = lookup_verse(canto, chapter, verse)
+    if cached:
+        if cached.get('success'):
+            PREFETCHER.schedule_after(canto, chapter, verse)
+        return cached
     
-    # Fetch from web (slow path)
-    print(f"⏳ Not in database, fetching from web (30-60 seconds)...")
-    web_result = fetch_from_vedabase(canto, chapter, verse)
+    # Fetch from web (slow path); concurrent requests for this verse share one fetch
+    with PREFETCHER.user_fetch():
+        web_result = VERSE_FLIGHTS.do(('verse', canto, chapter, verse), fetch_and_store_verse, canto, chapter, verse)
+    PREFETCHER.schedule_after(canto, chapter, verse)
     
     if web_result:
-        # Save to database for next time
-        save_to_database(canto, chapter, verse, web_result['devanagari_verse'], 
-                        web_result['sanskrit_verse'], web_result['word_meanings'],
-                        web_result['translation'], web_result['purport'])
-        
         return {
             'success': True,
             'reference': verse_ref,
             **web_result,
-            'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/'
+            'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/',
+            'navigation': CHAPTER_INDEX.navigation(canto, chapter, verse)
         }
     
+    missing = get_missing_verse(canto, chapter, verse)
+    if missing:
+        return _missing_response(canto, chapter, verse, missing)
+    
     return {
         'success': False,
         'error': f'Could not fetch verse {verse_ref}. The site may be slow. Please try again in a moment.'
     }
 
+# ==================== PREFETCH ====================
+
+class Prefetcher:
+    """Warms the next few verses after each request on a bounded, low-priority background queue"""
+
+    def __init__(self, ahead, max_queued):
+        self.ahead = ahead
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._queued = set()
+        self._prefetched = set()
+        self._chapter_ends = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._user_fetches = 0
+        self._thread = None
+        self._pid = None
+        self.counters = {'scheduled': 0, 'dropped': 0, 'already_cached': 0, 'fetched': 0,
+                         'failed': 0, 'hits': 0, 'preempted_waits': 0}
+
+    def _incr(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='prefetcher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    @contextlib.contextmanager
+    def user_fetch(self):
+        """Mark a user-facing scrape in progress; the prefetcher won't start new work until it ends"""
+        with self._lock:
+            self._user_fetches += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._user_fetches -= 1
+                self._idle.notify_all()
+
+    def learn_chapter_end(self, canto, chapter, last_verse):
+        with self._lock:
+            self._chapter_ends[(canto, chapter)] = last_verse
+
+    def note_request(self, canto, chapter, verse):
+        """Count a hit when a user asks for a verse we prefetched"""
+        with self._lock:
+            if (canto, chapter, verse) in self._prefetched:
+                self._prefetched.discard((canto, chapter, verse))
+                self.counters['hits'] += 1
+
+    def _following(self, canto, chapter, verse):
+        """The next self.ahead texts of this chapter: from the table of contents where indexed, else the next verse numbers"""
+        key = (canto, chapter, verse)
+        for _ in range(self.ahead):
+            following = CHAPTER_INDEX.next_text(*key)
+            # next_text runs on into the next chapter for navigation; prefetch stops at the chapter's end
+            if following is not None and following[:2] != key[:2]:
+                return
+            if following is None:
+                c, ch, v = key
+                with self._lock:
+                    end = self._chapter_ends.get((c, ch))
+                if end is not None and v + 1 > end:
+                    return
+                following = (c, ch, v + 1)
+            yield following
+            key = following
+
+    def schedule_after(self, canto, chapter, verse):
+        if not config.PREFETCH_ENABLED:
+            return
+        self._ensure_thread()
+        
+        for key in self._following(canto, chapter, verse):
+            with self._lock:
+                if key in self._queued or key in self._prefetched:
+                    continue
+                try:
+                    self._queue.put_nowait(key)
+                except queue.Full:
+                    self.counters['dropped'] += 1
+                    break
+                self._queued.add(key)
+                self.counters['scheduled'] += 1
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            canto, chapter, verse = key
+            
+            with self._lock:
+                if self._user_fetches:
+                    self.counters['preempted_waits'] += 1
+                while self._user_fetches:
+                    self._idle.wait()
+                self._queued.discard(key)
+                end = self._chapter_ends.get((canto, chapter))
+            
+            if (end is not None and verse > end) or CHAPTER_INDEX.check(canto, chapter, verse):
+                continue
+            
+            try:
+                if VERSE_PRESENCE.contains(canto, chapter, verse) or get_missing_verse(canto, chapter, verse):
+                    self._incr('already_cached')
+                else:
+                    print(f"🔮 Prefetching SB {canto}.{chapter}.{verse}")
+                    # Browser attempts run at background priority, so user fetches take the next free slot
+                    if VERSE_FLIGHTS.do(('verse', canto, chapter, verse), fetch_and_store_verse,
+                                        canto, chapter, verse, True):
+                        self._incr('fetched')
+                        with self._lock:
+                            self._prefetched.add(key)
+                    else:
+                        self._incr('failed')
+                
+                missing = get_missing_verse(canto, chapter, verse)
+                if missing and missing[0] == 'not_found':
+                    # The first verse with no page marks the end of the chapter
+                    self.learn_chapter_end(canto, chapter, verse - 1)
+            except Exception as e:
+                print(f"⚠️ Prefetch error for SB {canto}.{chapter}.{verse}: {type(e).__name__}: {e}")
+                self._incr('failed')
+
+    def stats(self):
+        with self._lock:
+            fetched = self.counters['fetched']
+            return {
+                **self.counters,
+                'ahead': self.ahead,
+                'queued': self._queue.qsize(),
+                'unused': len(self._prefetched),
+                'hit_rate': round(self.counters['hits'] / fetched, 3) if fetched else None,
+                'known_chapter_ends': len(self._chapter_ends)
+            }
+
+
+PREFETCHER = Prefetcher(config.PREFETCH_AHEAD, config.PREFETCH_QUEUE_SIZE)
+
+# ==================== BACKGROUND FETCH JOBS ====================
+
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=config.JOB_WORKERS, thread_name_prefix='fetch-job')
+_JOBS = {}
+_JOBS_BY_VERSE = {}
+_JOBS_LOCK = threading.Lock()
+_JOB_LISTENERS = {}  # job_id -> (verse key, FETCH_PROGRESS listener) while the job runs
+
+
+def _prune_jobs():
+    """Forget finished jobs older than config.JOB_TTL (caller holds _JOBS_LOCK)"""
+    cutoff = time.time() - config.JOB_TTL
+    for job_id, job in list(_JOBS.items()):
+        if job['finished_at'] and job['finished_at'] < cutoff:
+            del _JOBS[job_id]
+
+
+def _run_job(job_id, canto, chapter, verse):
+    with _JOBS_LOCK:
+        _JOBS[job_id]['status'] = 'running'
+    try:
+        result = fetch_verse_hybrid(canto, chapter, verse)
+    except Exception as e:
+        print(f"❌ Job {job_id} error: {type(e).__name__}: {e}")
+        result = {'success': False, 'error': str(e)}
+    with _JOBS_LOCK:
+        _drain_job_progress(job_id)
+        job = _JOBS[job_id]
+        job['status'] = 'done' if result.get('success') else 'failed'
+        job['result'] = result
+        job['finished_at'] = time.time()
+        _JOBS_BY_VERSE.pop((canto, chapter, verse), None)
+        FETCH_PROGRESS.unsubscribe(canto, chapter, _JOB_LISTENERS.pop(job_id)[1])
+
+
+def _drain_job_progress(job_id):
+    """Fold queued progress events into the job's phase and sections (caller holds _JOBS_LOCK)"""
+    if job_id not in _JOB_LISTENERS:
+        return
+    job = _JOBS[job_id]
+    listener = _JOB_LISTENERS[job_id][1]
+    while True:
+        try:
+            event, data = listener.get_nowait()
+        except queue.Empty:
+            return
+        if event == 'progress':
+            job['phase'] = data['phase']
+        elif event == 'section':
+            job['sections'][data['name']] = data['value']
+
+
+def submit_fetch_job(canto, chapter, verse):
+    """Queue a scrape in the background and return its job id; one job per verse at a time"""
+    with _JOBS_LOCK:
+        _prune_jobs()
+        job_id = _JOBS_BY_VERSE.get((canto, chapter, verse))
+        if job_id:
+            return job_id
+        
+        job_id = uuid.uuid4().hex
+        _JOBS[job_id] = {
+            'job_id': job_id,
+            'reference': f"SB {canto}.{chapter}.{verse}",
+            'status': 'queued',
+            'phase': None,
+            'sections': {},
+            'created_at': time.time(),
+            'finished_at': None,
+            'result': None
+        }
+        _JOBS_BY_VERSE[(canto, chapter, verse)] = job_id
+        # Pollers see the phase and the sections parsed so far, without holding a request thread
+        _JOB_LISTENERS[job_id] = ((canto, chapter, verse), FETCH_PROGRESS.subscribe(canto, chapter, verse))
+    
+    JOB_EXECUTOR.submit(_run_job, job_id, canto, chapter, verse)
+    return job_id
+
+
+def get_job(job_id):
+    with _JOBS_LOCK:
+        if job_id in _JOBS:
+            _drain_job_progress(job_id)
+        job = _JOBS.get(job_id)
+        return {**job, 'sections': dict(job['sections'])} if job else None
+
+# ==================== BATCH LOOKUP ====================
+
+_REF_RE = re.compile(r'^(?:[śŚs]b\s*)?(\d+)\.(\d+)\.(\d+)(?:\s*[-–]\s*(\d+))?$', re.IGNORECASE)
+BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=config.BATCH_FETCH_PARALLELISM, thread_name_prefix='batch-fetch')
+
+
+def parse_verse_refs(refs):
+    """Expand "1.1.1-20", "SB 2.3.4" or a list/comma-separated mix of them into (canto, chapter, verse) tuples"""
+    if isinstance(refs, str):
+        refs = refs.split(',')
+    
+    keys = []
+    for ref in refs:
+        match = _REF_RE.match(str(ref).strip())
+        if not match:
+            raise ValueError(f"Invalid verse reference: {ref!r}")
+        canto, chapter, first = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        last = int(match.group(4) or first)
+        if last < first:
+            raise ValueError(f"Invalid verse range: {ref!r}")
+        # Check the size before expanding, so a huge range can't allocate first
+        if len(keys) + (last - first + 1) > config.BATCH_MAX_VERSES:
+            raise ValueError(f"Too many verses requested (max {config.BATCH_MAX_VERSES})")
+        keys.extend((canto, chapter, verse) for verse in range(first, last + 1))
+    
+    # Keep the first occurrence of each verse, in request order
+    return list(dict.fromkeys(keys))
+
+
+def _batch_item(key, status, result):
+    canto, chapter, verse = key
+    return {'canto': canto, 'chapter': chapter, 'verse': verse, **result, 'status': status}
+
+
+def fetch_verses_batch(keys):
+    """Yield one result per verse: database hits first (one query per chapter), then scraped misses as they finish"""
+    by_chapter = {}
+    for canto, chapter, verse in keys:
+        by_chapter.setdefault((canto, chapter), []).append(verse)
+    
+    hits = {}
+    for (canto, chapter), verses in by_chapter.items():
+        stored = [verse for verse in verses if VERSE_PRESENCE.contains(canto, chapter, verse)]
+        for verse, record in get_verses_from_database(canto, chapter, stored).items():
+            hits[(canto, chapter, verse)] = record
+    
+    misses = []
+    for key in keys:
+        if key in hits:
+            canto, chapter, verse = key
+            yield _batch_item(key, 'cached', {
+                'success': True,
+                'reference': f"SB {canto}.{chapter}.{verse}",
+                **hits[key],
+                'url': f'https://vedabase.io/en/library/sb/{canto}/{chapter}/{verse}/'
+            })
+        else:
+            misses.append(key)
+    
+    if misses:
+        print(f"📦 Batch: {len(hits)} cached, scraping {len(misses)}")
+    
+    futures = {BATCH_EXECUTOR.submit(fetch_verse_hybrid, *key): key for key in misses}
+    try:
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            
+            if result.get('success'):
+                status = 'fetched'
+            elif result.get('missing'):
+                status = 'missing'
+            else:
+                status = 'error'
+            yield _batch_item(key, status, result)
+    finally:
+        # A streaming client that disconnects closes the generator; don't keep scraping for it
+        cancelled = sum(1 for future in futures if future.cancel())
+        if cancelled:
+            print(f"🛑 Batch abandoned, cancelled {cancelled} pending fetches")
+
+# ==================== STREAMING (SERVER-SENT EVENTS) ====================
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_verse(canto, chapter, verse):
+    """Yield SSE events for a verse: progress phases, each section as it is extracted, then done/error"""
+    yield _sse('progress', {'phase': 'cache'})
+    
+    listener = FETCH_PROGRESS.subscribe(canto, chapter, verse)
+    try:
+        result = lookup_verse(canto, chapter, verse)
+        sent = set()
+        
+        if result is None:
+            # Follow the same background job pollers of /jobs/<id> share, rather than starting another scrape
+            job_id = submit_fetch_job(canto, chapter, verse)
+            while True:
+                try:
+                    event, data = listener.get(timeout=0.5)
+                except queue.Empty:
+                    job = get_job(job_id)
+                    if not job or job['finished_at']:
+                        break
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+                    continue
+                if event == 'section':
+                    if data['name'] in sent:
+                        continue
+                    sent.add(data['name'])
+                yield _sse(event, data)
+            result = job['result'] if job else {'success': False, 'error': 'Fetch job expired'}
+        
+        if not result.get('success'):
+            yield _sse('error', {k: result.get(k) for k in ('error', 'missing', 'combined_range')})
+            return
+        
+        # Sections not streamed yet (cache hit, chapter ingest, or a fetch we joined late)
+        for name in VERSE_SECTIONS:
+            if result.get(name) and name not in sent:
+                yield _sse('section', {'name': name, 'value': result[name]})
+        
+        yield _sse('done', {k: result.get(k) for k in ('reference', 'source', 'url', 'navigation')})
+    finally:
+        FETCH_PROGRESS.unsubscribe(canto, chapter, listener)
+
 # YouTube functions
 _VIDEO_MAPPING_CACHE = None
 
@@ -526,6 +3545,50 @@ def debug_mapping():
             'traceback': traceback.format_exc()
         })
 
+@app.route('/debug/browser_pool', methods=['GET'])
+def debug_browser_pool():
+    """Health and recycling stats for the warm browser pool"""
+    return jsonify({'success': True, **BROWSER_POOL.stats()})
+
+@app.route('/debug/stats', methods=['GET'])
+def debug_stats():
+    """Counters for the scraping and caching layers"""
+    return jsonify({
+        'success': True,
+        'resource_blocking': RESOURCE_BLOCK_STATS.stats(),
+        'single_flight': VERSE_FLIGHTS.stats(),
+        'leases': LEASE_STATS.stats(),
+        'prefetch': PREFETCHER.stats(),
+        'db_pool': DB_POOL.stats(),
+        'writer': VERSE_WRITER.stats(),
+        'verse_cache': VERSE_CACHE.stats(),
+        'read_replica': READ_REPLICA.stats(),
+        'bundle': VERSE_BUNDLE.stats(),
+        'backups': BACKUPS.stats(),
+        'presence': VERSE_PRESENCE.stats(),
+        'toc': CHAPTER_INDEX.stats()
+    })
+
+
+@app.route('/debug/replica/refresh', methods=['GET'])
+def refresh_replica():
+    """Reload the in-memory read replica from disk (e.g. after a crawl by another process)"""
+    if not config.READ_REPLICA:
+        return jsonify({'success': False, 'error': 'READ_REPLICA is disabled in config.py'}), 400
+    loaded = READ_REPLICA.refresh()
+    return jsonify({'success': bool(loaded), 'read_replica': READ_REPLICA.stats()})
+
+@app.route('/debug/clear_missing', methods=['GET'])
+def clear_missing():
+    """Invalidate the negative cache (optionally ?canto=&chapter=&verse=)"""
+    try:
+        cleared = clear_missing_verses(request.args.get('canto', type=int),
+                                       request.args.get('chapter', type=int),
+                                       request.args.get('verse', type=int))
+        return jsonify({'success': True, 'cleared': cleared})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/debug/clear_cache', methods=['GET'])
 def clear_cache():
     """Clear the video mapping cache"""
@@ -690,6 +3753,9 @@ def translate_text_cascade(text, source_lang='ta'):
 def ensure_database():
     if not hasattr(app, '_database_initialized'):
         init_db()
+        BACKUPS.ensure_started()
+        if config.READ_REPLICA:
+            READ_REPLICA.load()
         app._database_initialized = True
 
 @app.route('/')
@@ -704,6 +3770,21 @@ def get_verse():
         chapter = int(data.get('chapter'))
         verse = int(data.get('verse'))
         
+        # Job mode: answer hits now, hand misses to a background worker instead of holding this one
+        if data.get('async') or request.args.get('async'):
+            cached = lookup_verse(canto, chapter, verse)
+            if cached:
+                return jsonify(cached)
+            
+            job_id = submit_fetch_job(canto, chapter, verse)
+            print(f"📋 Queued job {job_id} for SB {canto}.{chapter}.{verse}")
+            return jsonify({
+                'success': True,
+                'pending': True,
+                'job_id': job_id,
+                'status_url': f'/jobs/{job_id}'
+            }), 202
+        
         result = fetch_verse_hybrid(canto, chapter, verse)
         return jsonify(result)
         
@@ -714,6 +3795,185 @@ def get_verse():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/search', methods=['GET'])
+def search():
+    """Full-text search over translations, purports, word meanings and Sanskrit (?q=&page=&per_page=)"""
+    if not FTS_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Search is not available on this server'}), 503
+    
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(50, max(1, request.args.get('per_page', 20, type=int)))
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query'}), 400
+    
+    start = time.time()
+    total, results = search_verses(query, page, per_page)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'took_ms': round((time.time() - start) * 1000, 2),
+        'results': results
+    })
+
+
+@app.route('/word/<path:term>', methods=['GET'])
+def word(term):
+    """Verses where a Sanskrit word appears and how it is glossed (?prefix=1 for words starting with term)"""
+    prefix = request.args.get('prefix', '0') in ('1', 'true', 'yes')
+    limit = min(1000, max(1, request.args.get('limit', 200, type=int)))
+    occurrences = lookup_word(term, prefix=prefix, limit=limit)
+    
+    glosses = {}
+    for occurrence in occurrences:
+        glosses[occurrence['gloss']] = glosses.get(occurrence['gloss'], 0) + 1
+    
+    return jsonify({
+        'success': True,
+        'term': normalize_term(term),
+        'count': len(occurrences),
+        'glosses': sorted(({'gloss': g, 'count': n} for g, n in glosses.items()), key=lambda g: -g['count']),
+        'occurrences': occurrences
+    })
+
+
+@app.route('/identify', methods=['GET'])
+def identify():
+    """Find verses from a remembered Sanskrit fragment, in any common transliteration (?q=&limit=)"""
+    fragment = request.args.get('q', '').strip()
+    limit = min(50, max(1, request.args.get('limit', 10, type=int)))
+    if len(verse_letters(fragment)) < 3:
+        return jsonify({'success': False, 'error': 'Fragment is too short; give at least a few syllables'}), 400
+    
+    start = time.time()
+    results = identify_verse(fragment, limit)
+    return jsonify({
+        'success': True,
+        'query': fragment,
+        'count': len(results),
+        'took_ms': round((time.time() - start) * 1000, 2),
+        'results': results
+    })
+
+
+@app.route('/coverage', methods=['GET'])
+def coverage():
+    """How much of each canto is stored (?canto= for per-chapter counts)"""
+    canto = request.args.get('canto', type=int)
+    if canto is not None and canto not in CHAPTERS_PER_CANTO:
+        return jsonify({'success': False, 'error': f'Canto must be between 1 and {len(CHAPTERS_PER_CANTO)}'}), 400
+    
+    start = time.time()
+    rows = VERSE_PRESENCE.coverage(canto)
+    result = {'success': True, 'took_ms': round((time.time() - start) * 1000, 3)}
+    if canto is None:
+        result['total_verses'] = sum(row['verses'] for row in rows)
+        result['cantos'] = rows
+    else:
+        result['canto'] = canto
+        result['chapters'] = rows
+    return jsonify(result)
+
+
+@app.route('/toc', methods=['GET'])
+def toc():
+    """Chapters and verse counts per canto, from the table of contents"""
+    cantos = CHAPTER_INDEX.toc()
+    stored = {row['canto']: row['verses'] for row in VERSE_PRESENCE.coverage()}
+    return jsonify({
+        'success': True,
+        'total_verses': sum(row['verses'] for row in cantos),
+        'cantos': [{**row, 'stored': stored[row['canto']]} for row in cantos]
+    })
+
+
+@app.route('/toc/<int:canto>', methods=['GET'])
+def toc_canto(canto):
+    """Title, verse count and combined texts of every chapter in a canto"""
+    if canto not in CHAPTERS_PER_CANTO:
+        return jsonify({'success': False, 'error': f'Canto must be between 1 and {len(CHAPTERS_PER_CANTO)}'}), 400
+
+    stored = {row['chapter']: row['verses'] for row in VERSE_PRESENCE.coverage(canto)}
+    chapters = [{**row, 'stored': stored[row['chapter']]} for row in CHAPTER_INDEX.toc(canto)]
+    return jsonify({
+        'success': True,
+        'canto': canto,
+        'indexed': CHAPTER_INDEX.indexed(canto),
+        'chapters': chapters
+    })
+
+
+@app.route('/fetch_verses', methods=['POST'])
+def get_verses_batch():
+    """Many verses at once: {"refs": "1.1.1-20"} or {"refs": ["1.1.1", "2.3.4-6"]}; add "stream": true for NDJSON"""
+    try:
+        data = request.json or {}
+        keys = parse_verse_refs(data.get('refs') or [])
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if data.get('stream'):
+        lines = (json.dumps(item, ensure_ascii=False) + '\n' for item in fetch_verses_batch(keys))
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    
+    order = {key: i for i, key in enumerate(keys)}
+    items = sorted(fetch_verses_batch(keys), key=lambda item: order[(item['canto'], item['chapter'], item['verse'])])
+    return jsonify({
+        'success': True,
+        'count': len(items),
+        'found': sum(1 for item in items if item['success']),
+        'verses': items
+    })
+
+
+@app.route('/fetch_verse/stream', methods=['GET'])
+def stream_verse_handler():
+    """Server-Sent Events variant of /fetch_verse (?canto=&chapter=&verse=)"""
+    try:
+        canto = int(request.args.get('canto'))
+        chapter = int(request.args.get('chapter'))
+        verse = int(request.args.get('verse'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'canto, chapter and verse must be numbers'}), 400
+    
+    print(f"📡 Streaming SB {canto}.{chapter}.{verse}")
+    return Response(stream_with_context(stream_verse(canto, chapter, verse)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status of a background fetch job, with the verse once it is done"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Unknown or expired job'}), 404
+    return jsonify({'success': True, **job})
+
+
+@app.route('/ingest_chapter', methods=['POST'])
+def ingest_chapter_handler():
+    """Fetch and store every verse of a chapter in one go"""
+    try:
+        data = request.json
+        canto = int(data.get('canto'))
+        chapter = int(data.get('chapter'))
+        
+        verses = ingest_chapter(canto, chapter)
+        if not verses:
+            return jsonify({'success': False, 'error': f'Could not ingest chapter {canto}.{chapter}'})
+        
+        return jsonify({'success': True, 'canto': canto, 'chapter': chapter,
+                        'count': len(verses), 'verses': sorted(verses)})
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @app.route('/open_youtube', methods=['POST'])
 def open_youtube():
     """Open YouTube video - SIMPLE VERSION"""
@@ -3,6 +3,8 @@ Configuration file for Srimad Bhagavatam Verse Finder
 Modify these settings to customize the application
 """
 
+import os
+
 # Server Configuration
 HOST = '0.0.0.0'  # Listen on all network interfaces (use '127.0.0.1' for localhost only)
 PORT = 5000       # Port number (change if 5000 is already in use)
@@ -18,15 +20,97 @@ USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 # Base URL for vedabase.io
 BASE_URL = 'https://vedabase.io/en/library/sb'
 
+# Database Configuration (SQLite, WAL mode)
+# Railway sets RAILWAY_VOLUME_MOUNT_PATH when a volume is attached; without one (or SB_DB_PATH) data is lost on restart
+_DATA_DIR = os.environ.get('RAILWAY_VOLUME_MOUNT_PATH')
+DB_PATH = os.environ.get('SB_DB_PATH') or os.path.join(_DATA_DIR or '/tmp', 'srimad_bhagavatam.db')  # Put this on a persistent disk in production
+DB_SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'srimad_bhagavatam.db')  # Copied to DB_PATH if it doesn't exist
+BACKUP_DIR = os.environ.get('SB_BACKUP_DIR') or (_DATA_DIR and os.path.join(_DATA_DIR, 'backups'))  # Online snapshots are written here (None = no periodic backups)
+BACKUP_INTERVAL = 6 * 3600          # Seconds between snapshots
+BACKUP_KEEP = 3                     # Newest snapshots kept
+DB_POOL_SIZE = 8                    # Pooled connections per worker process
+DB_MMAP_SIZE = 256 * 1024 * 1024    # Bytes of the database file to memory-map
+DB_CACHE_KB = 16000                 # Page cache per connection, in KiB
+DB_STATEMENT_CACHE = 128            # Prepared statements kept per connection
+
+WRITE_BATCH_SIZE = 500              # Verse rows per write-behind transaction
+WRITE_BATCH_WINDOW = 0.05           # Seconds the writer waits to fill a batch
+
+# Compressed text columns (zstd with dictionaries trained by `python db_tools.py compress`)
+COMPRESS_TEXT = False               # Store new purports and word meanings compressed (needs zstandard)
+COMPRESS_LEVEL = 9                  # zstd level; reads cost the same at any level
+COMPRESS_MIN_BYTES = 128            # Shorter values stay plain text
+COMPRESS_DICT_SIZE = 112640         # Bytes per trained dictionary
+
+# In-memory read replica of the verses table (loaded per worker with the SQLite backup API)
+READ_REPLICA = False                # Serve verse reads from memory; writes still go to disk first
+READ_REPLICA_REFRESH = 0            # Seconds between reloads from disk (0 = only via /debug/replica/refresh)
+
+# Read-only corpus bundle (written by `python db_tools.py export-bundle`, memory-mapped by every worker)
+BUNDLE_PATH = None                  # e.g. '/data/verses.bundle'; verses found there skip SQLite
+BUNDLE_CHECK_INTERVAL = 5           # Seconds between checks for a newly published bundle
+
+# In-memory presence bitmap (one bit per verse: is it stored?)
+PRESENCE_REFRESH = 300              # Seconds before rebuilding from disk, to see verses saved by other processes
+
+# Table of contents (chapter titles and verse counts, filled by `python db_tools.py toc` or the crawler)
+TOC_REFRESH = 300                   # Seconds before reloading it from disk, to see updates by other processes
+
 # Display Configuration
 SHOW_SANSKRIT = True      # Display Sanskrit verse
 SHOW_WORD_MEANINGS = True # Display word-for-word meanings
 SHOW_TRANSLATION = True   # Display English translation
 SHOW_PURPORT = True       # Display purport/explanation
 
-# Cache Configuration (for future implementation)
-ENABLE_CACHE = False      # Enable caching of fetched verses
+# Fetch Tiers
+HTTP_POOL_SIZE = 8        # Keep-alive connections to vedabase.io per worker
+CHAPTER_INGEST_ON_MISS = True  # On a miss, first try to store the whole chapter from its advanced-view page
+CHAPTER_INGEST_RETRY_AFTER = 3600  # Seconds before retrying a chapter page that didn't parse
+FETCH_HEDGE_DELAY = 2.0   # Seconds before the browser tier races a slow HTTP fetch (0 = race at once, None = strictly sequential)
+
+# Cross-worker fetch leases (stop several gunicorn workers scraping the same verse)
+FETCH_LEASE_TTL = 60             # Seconds a lease lives without renewal; the holder renews every TTL/3
+FETCH_LEASE_POLL_INTERVAL = 1.0  # Seconds between checks while another worker holds the lease
+
+# Negative cache for verses with no page of their own
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600  # Seconds to remember a missing or combined verse
+
+# Background fetch jobs (POST /fetch_verse with "async": true)
+JOB_WORKERS = 4   # Scrapes run concurrently in the background per worker process
+JOB_TTL = 600     # Seconds a finished job's result stays available at /jobs/<id>
+
+# Prefetch of the verses after each request
+PREFETCH_ENABLED = True
+PREFETCH_AHEAD = 3         # How many following verses to warm (k)
+PREFETCH_QUEUE_SIZE = 50   # Pending prefetches kept; extra ones are dropped
+
+# Batch verse API (POST /fetch_verses)
+BATCH_MAX_VERSES = 200         # Verses allowed in one request
+BATCH_FETCH_PARALLELISM = 4    # Misses scraped concurrently across all batch requests
+
+# Verse identification from a remembered fragment (/identify)
+IDENTIFY_MIN_GRAM_MATCH = 0.3  # Share of the fragment's trigrams a verse must contain to be a candidate
+IDENTIFY_CANDIDATES = 50       # Candidates kept after pruning for the finer re-ranking
+
+# Browser Pool Configuration (Playwright fallback scraping)
+BROWSER_POOL_SIZE = 2        # Warm Chromium browsers kept per worker process
+BROWSER_MAX_PAGES = 50       # Recycle a browser after this many fetches
+BROWSER_MAX_RSS_MB = 700     # Recycle a browser whose process tree exceeds this RSS (needs psutil)
+BROWSER_FETCH_TIMEOUT = 120  # Seconds a caller waits for a pooled fetch
+
+# Resource Blocking (browser scraping only reads page text)
+BLOCK_RESOURCE_TYPES = ['image', 'media', 'font', 'stylesheet']
+SCRAPE_PROFILES = {
+    # Per target site: hosts treated as first-party, and resource types it still needs
+    'vedabase.io': {'allow_hosts': ['vedabase.io'], 'allow_types': []},
+    'youtube.com': {'allow_hosts': ['youtube.com', 'googlevideo.com', 'ytimg.com'], 'allow_types': []},
+}
+
+# Cache Configuration (in-memory verse cache in front of SQLite, per worker process)
+ENABLE_CACHE = True       # Enable caching of fetched verses
 CACHE_DURATION = 3600     # Cache duration in seconds (1 hour)
+CACHE_MAX_ENTRIES = 2000  # Verses kept; least recently used are evicted first
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # Total text kept, in bytes
 
 # Rate Limiting (for future implementation)
 ENABLE_RATE_LIMIT = False # Enable rate limiting
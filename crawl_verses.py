@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Crawler that fills the verse database for whole cantos, resuming where it stopped
+Usage: python crawl_verses.py [--canto N ...] [--workers N] [--delay SECONDS] [--mode http|browser] [--no-toc]
+Example: python crawl_verses.py --canto 1 --workers 3
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import app_hybrid
+
+MAX_CHAPTER_ATTEMPTS = 3
+MAX_CONSECUTIVE_MISSES = 3
+
+
+class HostThrottle:
+    """Keeps at least min_interval seconds between requests to the same host"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CrawlProgress:
+    """Thread-safe progress and throughput counters"""
+
+    def __init__(self, total_chapters):
+        self.total_chapters = total_chapters
+        self.chapters_done = 0
+        self.verses = 0
+        self.failures = 0
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, canto, chapter, count):
+        with self._lock:
+            self.chapters_done += 1
+            self.verses += count
+            if not count:
+                self.failures += 1
+            minutes = max(time.time() - self.start, 1e-6) / 60
+            status = f"✅ {count} verses" if count else "❌ failed"
+            print(f"[{self.chapters_done}/{self.total_chapters}] SB {canto}.{chapter} {status} | "
+                  f"{self.verses} total | {self.verses / minutes:.1f} verses/min")
+
+
+def load_checkpoint():
+    with app_hybrid.db_connection() as conn:
+        rows = conn.execute('SELECT canto, chapter, status, attempts FROM crawl_checkpoint').fetchall()
+    return {(canto, chapter): (status, attempts) for canto, chapter, status, attempts in rows}
+
+
+def save_checkpoint(canto, chapter, status, verses):
+    with app_hybrid.db_connection() as conn, conn:
+        conn.execute('''INSERT INTO crawl_checkpoint (canto, chapter, status, verses, attempts, updated_at)
+                        VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP)
+                        ON CONFLICT(canto, chapter) DO UPDATE SET
+                            status=excluded.status, verses=excluded.verses,
+                            attempts=attempts + 1, updated_at=CURRENT_TIMESTAMP''',
+                     (canto, chapter, status, verses))
+
+
+def crawl_chapter_by_verse(canto, chapter, throttle, use_browser=True, wanted=None):
+    """Fallback when the chapter page can't be parsed: walk the verses one by one"""
+    # --mode http means static pages only, here as for the chapter page
+    fetch = app_hybrid.fetch_verse_tiered if use_browser else app_hybrid.fetch_from_vedabase_http
+    verses = {}
+    wanted = wanted or app_hybrid.CHAPTER_INDEX.text_starts(canto, chapter)
+    if wanted:
+        # The table of contents says exactly which texts exist
+        for verse in wanted:
+            throttle.wait()
+            try:
+                result = fetch(canto, chapter, verse)
+            except app_hybrid.VerseNotFound as e:
+                print(f"🚫 {e}")
+                continue
+            if result:
+                verses[verse] = result
+    else:
+        verse = 1
+        misses = 0
+        # Combined texts (e.g. 2-3) leave gaps, so only stop after several misses in a row
+        while misses < MAX_CONSECUTIVE_MISSES:
+            throttle.wait()
+            try:
+                result = fetch(canto, chapter, verse)
+            except app_hybrid.VerseNotFound as e:
+                if not e.combined_range:
+                    # A 404 means we ran past the end of the chapter
+                    break
+                result = None
+            else:
+                if result:
+                    verses[verse] = result
+                    misses = 0
+                    verse = result.get('last_verse', verse)
+                else:
+                    misses += 1
+            verse += 1
+
+    if verses:
+        app_hybrid.save_verses_bulk(canto, chapter, verses)
+    return len(verses)
+
+
+def crawl_chapter(canto, chapter, throttle, use_browser, per_verse_fallback):
+    throttle.wait()
+    verses = app_hybrid.ingest_chapter(canto, chapter, use_browser=use_browser)
+    count = len(verses)
+    if per_verse_fallback:
+        if not count:
+            count = crawl_chapter_by_verse(canto, chapter, throttle, use_browser)
+        else:
+            # Fetch texts the table of contents lists but the chapter page didn't yield
+            missed = [v for v in app_hybrid.CHAPTER_INDEX.text_starts(canto, chapter) or () if v not in verses]
+            if missed:
+                print(f"🔍 SB {canto}.{chapter}: {len(missed)} text(s) missing from the chapter page")
+                count += crawl_chapter_by_verse(canto, chapter, throttle, use_browser, missed)
+    # Only mark the chapter done once its rows are committed, so a kill can't lose them
+    app_hybrid.flush_writes()
+    save_checkpoint(canto, chapter, 'done' if count else 'failed', count)
+    return count
+
+
+def index_cantos(cantos, throttle):
+    """Fill the table of contents for cantos not fully indexed yet"""
+    for canto in cantos:
+        if app_hybrid.CHAPTER_INDEX.indexed(canto):
+            continue
+        try:
+            app_hybrid.index_canto(canto, pause=throttle.wait)
+        except app_hybrid.requests.exceptions.RequestException as e:
+            print(f"⚠️  Could not index canto {canto}, crawling without its table of contents: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the verse database from vedabase.io')
+    parser.add_argument('--canto', type=int, action='append', choices=range(1, 13),
+                        help='Canto to crawl (repeatable, default: all 12)')
+    parser.add_argument('--workers', type=int, default=2, help='Chapters fetched concurrently (default: 2)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='Minimum seconds between requests to vedabase.io (default: 1.0)')
+    parser.add_argument('--mode', choices=['http', 'browser'], default='browser',
+                        help='http: static pages only; browser: fall back to the browser pool (default)')
+    parser.add_argument('--no-verse-fallback', action='store_true',
+                        help="Don't fetch verse by verse when a chapter page can't be parsed")
+    parser.add_argument('--no-toc', action='store_true',
+                        help="Don't fill the table of contents (chapter titles and verse counts) first")
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and crawl everything again')
+    parser.add_argument('--db', help=f'Database path (default: {app_hybrid.DB_PATH})')
+    args = parser.parse_args()
+
+    if args.db:
+        app_hybrid.DB_PATH = args.db
+    app_hybrid.init_db()
+
+    cantos = sorted(set(args.canto or app_hybrid.CHAPTERS_PER_CANTO))
+    throttle = HostThrottle(args.delay)
+    if not args.no_toc:
+        index_cantos(cantos, throttle)
+    checkpoint = {} if args.restart else load_checkpoint()
+
+    todo = []
+    for canto in cantos:
+        for chapter in range(1, app_hybrid.CHAPTERS_PER_CANTO[canto] + 1):
+            status, attempts = checkpoint.get((canto, chapter), (None, 0))
+            if status == 'done' or (status == 'failed' and attempts >= MAX_CHAPTER_ATTEMPTS):
+                continue
+            todo.append((canto, chapter))
+
+    print(f"\n🕉️  Crawling canto(s) {', '.join(map(str, cantos))}: {len(todo)} chapters to fetch")
+    if not todo:
+        print("✅ Nothing to do, checkpoint says everything is crawled")
+        return
+
+    progress = CrawlProgress(len(todo))
+    use_browser = args.mode == 'browser'
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(crawl_chapter, canto, chapter, throttle, use_browser,
+                                not args.no_verse_fallback): (canto, chapter)
+                for canto, chapter in todo
+            }
+            for future in as_completed(futures):
+                canto, chapter = futures[future]
+                try:
+                    progress.record(canto, chapter, future.result())
+                except Exception as e:
+                    print(f"❌ SB {canto}.{chapter}: {type(e).__name__}: {e}")
+                    save_checkpoint(canto, chapter, 'failed', 0)
+                    progress.record(canto, chapter, 0)
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted - rerun the same command to resume from the checkpoint")
+        sys.exit(1)
+
+    minutes = (time.time() - progress.start) / 60
+    print(f"\n✅ Done: {progress.verses} verses in {minutes:.1f} min, {progress.failures} chapter(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Maintenance tools for the verse database
+Usage: python db_tools.py <command> [options]
+Example: python db_tools.py stress --readers 6 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import app_hybrid
+import config
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _scratch_database(name):
+    """Point the app at a new temporary database that isn't seeded from a backup or the shipped snapshot"""
+    config.DB_SEED_PATH = None
+    config.BACKUP_DIR = None
+    app_hybrid.DB_PATH = os.path.join(tempfile.mkdtemp(), name)
+
+
+def stress(args):
+    """Hammer the pool with readers while a writer holds long write transactions"""
+    _scratch_database('stress.db')
+    app_hybrid.DB_POOL.size = args.readers + 2
+    # Readers must reach SQLite, not the in-memory verse cache
+    config.ENABLE_CACHE = False
+    app_hybrid.init_db()
+
+    keys = [(1, chapter, verse) for chapter in range(1, 11) for verse in range(1, 51)]
+    for chapter in range(1, 11):
+        app_hybrid.save_verses_bulk(1, chapter, {
+            verse: {'devanagari_verse': '', 'sanskrit_verse': f'verse {verse}', 'word_meanings': '',
+                    'translation': 'x' * 500, 'purport': 'y' * 4000}
+            for verse in range(1, 51)
+        })
+    app_hybrid.flush_writes()
+
+    stop = threading.Event()
+    latencies = []
+    failures = []
+    write_txns = [0]
+    lock = threading.Lock()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            with app_hybrid.db_connection() as conn:
+                # EXCLUSIVE locks readers out in rollback-journal mode; under WAL it only excludes other writers
+                conn.execute('BEGIN EXCLUSIVE')
+                for _ in range(50):
+                    n += 1
+                    conn.execute('''INSERT OR REPLACE INTO verses
+                                    (canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings,
+                                     translation, purport)
+                                    VALUES (2, 1, ?, '', 'w', '', 't', 'p')''', (n % 1000,))
+                # Hold the write lock so readers would queue behind it without WAL
+                time.sleep(args.hold)
+                conn.commit()
+            write_txns[0] += 1
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            key = random.choice(keys)
+            start = time.perf_counter()
+            result = app_hybrid.get_from_database(*key)
+            local.append(time.perf_counter() - start)
+            if result is None:
+                with lock:
+                    failures.append(key)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(args.readers)]
+    print(f"\n🔨 {args.readers} readers vs 1 writer holding {args.hold}s write transactions for {args.seconds}s")
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    p50, p99, worst = (_percentile(latencies, 50), _percentile(latencies, 99), max(latencies))
+    print(f"📊 {len(latencies)} reads, {write_txns[0]} write transactions, {len(failures)} failed reads")
+    print(f"   read latency p50 {p50 * 1000:.2f} ms | p99 {p99 * 1000:.2f} ms | max {worst * 1000:.2f} ms")
+
+    # A blocked reader would wait for most of a write transaction
+    if failures or worst > args.hold / 2:
+        print("❌ FAIL - readers were blocked by the writer")
+        return 1
+    print("✅ PASS - readers never waited on the writer")
+    return 0
+
+
+def write_bench(args):
+    """Measure how fast the write-behind writer commits queued verse rows"""
+    _scratch_database('writes.db')
+    app_hybrid.init_db()
+
+    purport = 'y' * args.purport_bytes
+    start = time.perf_counter()
+    for n in range(args.rows):
+        app_hybrid.save_to_database(1 + n // 10000, 1 + (n // 100) % 100, 1 + n % 100,
+                                    '', f'verse {n}', 'a — b; c — d', 'translation', purport)
+    enqueued = time.perf_counter() - start
+    app_hybrid.flush_writes(timeout=600)
+    elapsed = time.perf_counter() - start
+
+    stats = app_hybrid.VERSE_WRITER.stats()
+    print(f"\n✍️  {args.rows} rows enqueued in {enqueued:.2f}s, committed in {elapsed:.2f}s "
+          f"({args.rows / elapsed:.0f} rows/s)")
+    print(f"   {stats['batches']} batches, largest {stats['largest_batch']} rows, {stats['failed_rows']} failed rows")
+    return 1 if stats['failed_rows'] else 0
+
+
+def read_bench(args):
+    """Compare verse read latency from the on-disk database and from the in-memory replica"""
+    config.ENABLE_CACHE = False
+    if args.db:
+        app_hybrid.DB_PATH = args.db
+        app_hybrid.init_db()
+    else:
+        _scratch_database('reads.db')
+        app_hybrid.init_db()
+        print(f"\n🌱 Seeding {args.verses} synthetic verses")
+        app_hybrid.VERSE_WRITER.enqueue(
+            (1 + n // 2000, 1 + (n // 100) % 20, 1 + n % 100, '', f'verse {n}', 'a — b; c — d',
+             'translation ' * 20, 'purport ' * 300)
+            for n in range(args.verses))
+        app_hybrid.flush_writes(timeout=600)
+
+    with app_hybrid.db_connection() as conn:
+        keys = conn.execute('SELECT canto, chapter, verse FROM verses').fetchall()
+    if not keys:
+        print("ℹ️  No verses stored")
+        return 1
+
+    def measure(threads=1):
+        times = []
+        lock = threading.Lock()
+
+        def reader(reads):
+            local = []
+            for _ in range(reads):
+                key = random.choice(keys)
+                start = time.perf_counter()
+                app_hybrid.get_from_database(*key)
+                local.append(time.perf_counter() - start)
+            with lock:
+                times.extend(local)
+
+        workers = [threading.Thread(target=reader, args=(args.reads // threads,)) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        return times, len(times) / (time.perf_counter() - start)
+
+    config.READ_REPLICA = False
+    disk = measure()
+    config.READ_REPLICA = True
+    app_hybrid.READ_REPLICA.load()
+    memory = measure()
+    # Request threads read the replica at the same time; they must not queue behind each other
+    concurrent = measure(args.threads)
+    replica = app_hybrid.READ_REPLICA.stats()
+    config.READ_REPLICA = False
+    config.BUNDLE_PATH = os.path.join(tempfile.mkdtemp(), 'verses.bundle')
+    app_hybrid.export_bundle(config.BUNDLE_PATH)
+    bundle = measure()
+
+    print(f"\n⏱️  {args.reads} random reads over {len(keys)} verses")
+    for label, (times, rate) in (('on-disk (WAL, mmap)', disk), ('in-memory replica', memory),
+                                 (f'replica, {args.threads} threads', concurrent), ('mapped bundle', bundle)):
+        print(f"   {label:<22} p50 {_percentile(times, 50) * 1000:.3f} ms | p99 {_percentile(times, 99) * 1000:.3f} ms"
+              f" | {rate:.0f} reads/s")
+    print(f"   replica loaded in {replica['load_seconds']}s, {replica['bytes'] / 1024 / 1024:.1f} MB in memory")
+    return 0
+
+
+def export_bundle(args):
+    """Write the verses table to a memory-mapped bundle and publish it atomically"""
+    app_hybrid.DB_PATH = args.db
+    app_hybrid.init_db()
+    start = time.perf_counter()
+    verses, size = app_hybrid.export_bundle(args.out)
+    print(f"\n📦 Wrote {verses} verses to {args.out} ({_mb(size)}) in {time.perf_counter() - start:.2f}s")
+    print(f"💡 Set BUNDLE_PATH = {args.out!r} in config.py; running workers pick up a new bundle within "
+          f"{config.BUNDLE_CHECK_INTERVAL}s")
+    return 0
+
+
+def backup(args):
+    """Take an online snapshot of the database"""
+    if not args.out_dir:
+        print("❌ Give --out-dir or set SB_BACKUP_DIR")
+        return 1
+    app_hybrid.DB_PATH = args.db
+    app_hybrid.init_db()
+    path = app_hybrid.backup_database(args.out_dir)
+    print(f"\n💾 {args.db} → {path} ({_mb(os.path.getsize(path))})")
+    return 0
+
+
+def restore(args):
+    """Copy a snapshot over the database, online, after checking that the snapshot is intact"""
+    source = args.source or next(iter(app_hybrid.list_backups(args.backup_dir)), None)
+    if not source or not os.path.exists(source):
+        print("❌ No snapshot to restore; give --from or --backup-dir")
+        return 1
+
+    with app_hybrid.sqlite3.connect(f"file:{app_hybrid.quote(os.path.abspath(source))}?mode=ro", uri=True) as check:
+        result = check.execute('PRAGMA quick_check').fetchone()[0]
+        verses = check.execute('SELECT count(*) FROM verses').fetchone()[0]
+    if result != 'ok':
+        print(f"❌ {source} failed its integrity check: {result}")
+        return 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    app_hybrid.copy_database(source, args.db)
+    print(f"\n♻️  Restored {verses} verses from {source} into {args.db}")
+    print("💡 Running workers: GET /debug/replica/refresh if READ_REPLICA is on; cached verses expire "
+          f"within CACHE_DURATION ({config.CACHE_DURATION}s)")
+    return 0
+
+
+def toc(args):
+    """Fill the chapters table from vedabase's canto and chapter index pages"""
+    app_hybrid.DB_PATH = args.db
+    app_hybrid.init_db()
+    cantos = args.canto or list(app_hybrid.CHAPTERS_PER_CANTO)
+    failed = 0
+    for canto in cantos:
+        try:
+            app_hybrid.index_canto(canto, pause=lambda: time.sleep(args.delay), force=args.force)
+        except app_hybrid.requests.exceptions.RequestException as e:
+            print(f"❌ Canto {canto}: {e}")
+            failed += 1
+
+    print()
+    for row in app_hybrid.CHAPTER_INDEX.toc():
+        if row['canto'] in cantos:
+            print(f"  Canto {row['canto']:>2}: {row['chapters_indexed']}/{row['chapters']} chapters, "
+                  f"{row['verses']} verses")
+    return 1 if failed else 0
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.2f} MB"
+
+
+def _db_file_size():
+    """Database size on disk after folding the WAL back into the main file"""
+    with app_hybrid.db_connection() as conn:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return sum(os.path.getsize(path) for path in (app_hybrid.DB_PATH, app_hybrid.DB_PATH + '-wal')
+               if os.path.exists(path))
+
+
+def _table_sizes():
+    try:
+        with app_hybrid.db_connection() as conn:
+            return conn.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC').fetchall()
+    except app_hybrid.sqlite3.OperationalError:
+        # SQLite built without the dbstat table
+        return []
+
+
+def _column_sizes(column):
+    """Rows, compressed rows, bytes as stored and bytes as plain text for one compressible column"""
+    table = app_hybrid.COMPRESSIBLE_COLUMNS[column]
+    rows = compressed = stored = plain = 0
+    with app_hybrid.db_connection() as conn:
+        for (value,) in conn.execute(f'SELECT {column} FROM {table} WHERE {column} IS NOT NULL'):
+            text = app_hybrid.TEXT_CODEC.decode(value)
+            rows += 1
+            compressed += isinstance(value, bytes)
+            stored += len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+            plain += len(text.encode('utf-8'))
+    return rows, compressed, stored, plain
+
+
+def compress(args):
+    """Train a zstd dictionary per column and rewrite the column compressed (or back to plain text)"""
+    if app_hybrid.zstandard is None:
+        print("❌ The zstandard package is required: pip install zstandard")
+        return 1
+    app_hybrid.DB_PATH = args.db
+    app_hybrid.init_db()
+    config.COMPRESS_LEVEL = args.level
+
+    size_before = _db_file_size()
+    print(f"\n🗜️  {'Decompressing' if args.decompress else 'Compressing'} {', '.join(args.columns)} in {args.db}")
+    for column in args.columns:
+        table = app_hybrid.COMPRESSIBLE_COLUMNS[column]
+        _, _, stored_before, _ = _column_sizes(column)
+        with app_hybrid.db_connection() as conn:
+            rows = [(rowid, app_hybrid.TEXT_CODEC.decode(value)) for rowid, value in
+                    conn.execute(f'SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL')]
+
+            if args.decompress:
+                with conn:
+                    conn.execute('DELETE FROM compression_dicts WHERE column_name=?', (column,))
+                updates = [(text, rowid) for rowid, text in rows]
+            else:
+                texts = [text.encode('utf-8') for _, text in rows if text and len(text) >= config.COMPRESS_MIN_BYTES]
+                samples = random.sample(texts, min(len(texts), args.samples))
+                try:
+                    dictionary = app_hybrid.zstandard.train_dictionary(args.dict_size, samples)
+                except app_hybrid.zstandard.ZstdError as e:
+                    print(f"   ⏭️  {column}: not enough text to train a dictionary ({len(samples)} values: {e})")
+                    continue
+                with conn:
+                    conn.execute('INSERT INTO compression_dicts (column_name, dict, samples) VALUES (?, ?, ?)',
+                                 (column, dictionary.as_bytes(), len(samples)))
+                app_hybrid.TEXT_CODEC.reload()
+                updates = [(app_hybrid.TEXT_CODEC.encode(column, text), rowid) for rowid, text in rows]
+
+            with conn:
+                conn.executemany(f'UPDATE {table} SET {column}=? WHERE rowid=?', updates)
+        app_hybrid.TEXT_CODEC.reload()
+
+        rows_after, compressed, stored_after, plain = _column_sizes(column)
+        print(f"   {column}: {rows_after} rows, {compressed} compressed, "
+              f"{_mb(stored_before)} → {_mb(stored_after)} (plain text {_mb(plain)})")
+
+    with app_hybrid.db_connection() as conn:
+        conn.execute('VACUUM')
+    size_after = _db_file_size()
+    print(f"📦 Database {_mb(size_before)} → {_mb(size_after)}")
+    if not args.decompress and not config.COMPRESS_TEXT:
+        print("💡 Set COMPRESS_TEXT = True in config.py so newly scraped verses are stored compressed too")
+    return 0
+
+
+def report(args):
+    """Database size by table and column, and what decompression adds to verse reads"""
+    app_hybrid.DB_PATH = args.db
+    config.ENABLE_CACHE = False
+    app_hybrid.init_db()
+
+    print(f"\n📦 {args.db}: {_mb(_db_file_size())}")
+    for name, size in _table_sizes()[:12]:
+        print(f"   {name:<32} {_mb(size):>12}")
+
+    print("\n🗜️  Compressible columns")
+    for column in app_hybrid.COMPRESSIBLE_COLUMNS:
+        rows, compressed, stored, plain = _column_sizes(column)
+        ratio = f"{plain / stored:.2f}x" if stored else "-"
+        print(f"   {column:<14} {rows:>7} rows, {compressed:>7} compressed, "
+              f"stored {_mb(stored):>10}, plain {_mb(plain):>10}, ratio {ratio}")
+
+    with app_hybrid.db_connection() as conn:
+        keys = conn.execute('SELECT canto, chapter, verse FROM verses ORDER BY random() LIMIT ?',
+                            (args.reads,)).fetchall()
+    if not keys:
+        print("\nℹ️  No verses stored, skipping read latency")
+        return 0
+
+    read_times = []
+    decode_times = []
+    for key in keys:
+        start = time.perf_counter()
+        app_hybrid.get_from_database(*key)
+        read_times.append(time.perf_counter() - start)
+
+        with app_hybrid.db_connection() as conn:
+            raw = conn.execute('SELECT word_meanings, purport FROM verses WHERE canto=? AND chapter=? AND verse=?',
+                               key).fetchone()
+        start = time.perf_counter()
+        for value in raw:
+            app_hybrid.TEXT_CODEC.decode(value)
+        decode_times.append(time.perf_counter() - start)
+
+    print(f"\n⏱️  {len(keys)} random verse reads")
+    print(f"   get_from_database p50 {_percentile(read_times, 50) * 1000:.3f} ms | "
+          f"p99 {_percentile(read_times, 99) * 1000:.3f} ms")
+    print(f"   of which decompression p50 {_percentile(decode_times, 50) * 1000:.3f} ms | "
+          f"p99 {_percentile(decode_times, 99) * 1000:.3f} ms")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verse database tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stress_parser = commands.add_parser('stress', help='Check that readers never block on the writer')
+    stress_parser.add_argument('--readers', type=int, default=6, help='Concurrent reader threads (default: 6)')
+    stress_parser.add_argument('--seconds', type=float, default=5, help='Test duration (default: 5)')
+    stress_parser.add_argument('--hold', type=float, default=0.5,
+                               help='Seconds the writer holds each write transaction (default: 0.5)')
+    stress_parser.set_defaults(func=stress)
+
+    bench_parser = commands.add_parser('write-bench', help='Measure write-behind throughput')
+    bench_parser.add_argument('--rows', type=int, default=20000, help='Rows to write (default: 20000)')
+    bench_parser.add_argument('--purport-bytes', type=int, default=2000,
+                              help='Size of each purport (default: 2000)')
+    bench_parser.set_defaults(func=write_bench)
+
+    read_parser = commands.add_parser('read-bench', help='Compare read latency on disk and from the in-memory replica')
+    read_parser.add_argument('--db', help='Database to read (default: a temporary one with synthetic verses)')
+    read_parser.add_argument('--verses', type=int, default=18000, help='Synthetic verses to seed (default: 18000)')
+    read_parser.add_argument('--reads', type=int, default=20000, help='Random reads per mode (default: 20000)')
+    read_parser.add_argument('--threads', type=int, default=8,
+                             help='Concurrent readers for the replica run (default: 8, the gunicorn thread count)')
+    read_parser.set_defaults(func=read_bench)
+
+    bundle_parser = commands.add_parser('export-bundle', help='Export verses to a read-only memory-mapped bundle')
+    bundle_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    bundle_parser.add_argument('--out', default=config.BUNDLE_PATH or 'verses.bundle',
+                               help='Bundle file to publish (default: BUNDLE_PATH or verses.bundle)')
+    bundle_parser.set_defaults(func=export_bundle)
+
+    backup_parser = commands.add_parser('backup', help='Take an online snapshot of the database')
+    backup_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    backup_parser.add_argument('--out-dir', default=config.BACKUP_DIR,
+                               help=f'Snapshot directory (default: SB_BACKUP_DIR, {config.BACKUP_DIR})')
+    backup_parser.set_defaults(func=backup)
+
+    restore_parser = commands.add_parser('restore', help='Restore the database from a snapshot')
+    restore_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    restore_parser.add_argument('--from', dest='source', help='Snapshot file (default: newest in --backup-dir)')
+    restore_parser.add_argument('--backup-dir', default=config.BACKUP_DIR,
+                                help=f'Where to look for the newest snapshot (default: SB_BACKUP_DIR, {config.BACKUP_DIR})')
+    restore_parser.set_defaults(func=restore)
+
+    toc_parser = commands.add_parser('toc', help='Fill the table of contents (chapter titles, verse counts)')
+    toc_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    toc_parser.add_argument('--canto', type=int, action='append', choices=range(1, 13),
+                            help='Canto to index (repeatable, default: all 12)')
+    toc_parser.add_argument('--delay', type=float, default=1.0,
+                            help='Seconds between requests to vedabase.io (default: 1.0)')
+    toc_parser.add_argument('--force', action='store_true', help='Fetch chapters that are already indexed again')
+    toc_parser.set_defaults(func=toc)
+
+    compress_parser = commands.add_parser('compress', help='Compress large text columns with trained zstd dictionaries')
+    compress_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    compress_parser.add_argument('--columns', nargs='+', choices=list(app_hybrid.COMPRESSIBLE_COLUMNS),
+                                 default=list(app_hybrid.COMPRESSIBLE_COLUMNS), help='Columns to rewrite (default: all)')
+    compress_parser.add_argument('--level', type=int, default=config.COMPRESS_LEVEL,
+                                 help=f'zstd level (default: {config.COMPRESS_LEVEL})')
+    compress_parser.add_argument('--dict-size', type=int, default=config.COMPRESS_DICT_SIZE,
+                                 help=f'Dictionary size in bytes (default: {config.COMPRESS_DICT_SIZE})')
+    compress_parser.add_argument('--samples', type=int, default=5000,
+                                 help='Values sampled to train each dictionary (default: 5000)')
+    compress_parser.add_argument('--decompress', action='store_true', help='Rewrite the columns as plain text again')
+    compress_parser.set_defaults(func=compress)
+
+    report_parser = commands.add_parser('report', help='Show database size and read latency')
+    report_parser.add_argument('--db', default=app_hybrid.DB_PATH, help=f'Database file (default: {app_hybrid.DB_PATH})')
+    report_parser.add_argument('--reads', type=int, default=2000, help='Random verse reads to time (default: 2000)')
+    report_parser.set_defaults(func=report)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_hybrid  # noqa: E402
+import config  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh database that isn't seeded from a backup or the shipped snapshot"""
+    monkeypatch.setattr(config, 'DB_SEED_PATH', None)
+    monkeypatch.setattr(config, 'BACKUP_DIR', None)
+    monkeypatch.setattr(config, 'PREFETCH_ENABLED', False)
+    monkeypatch.setattr(app_hybrid, 'DB_PATH', str(tmp_path / 'test.db'))
+    app_hybrid.init_db()
+    yield app_hybrid.DB_PATH
+    app_hybrid.flush_writes()
+    app_hybrid.VERSE_CACHE.clear()
@@ -0,0 +1,44 @@
+import app_hybrid
+
+
+def _index(rows):
+    index = app_hybrid.ChapterIndex()
+    index.store(rows)
+    return index
+
+
+def test_check_rejects_verses_outside_the_table_of_contents(db):
+    index = _index([(1, 1, 'Questions by the Sages', 23, [(20, 21)])])
+
+    assert index.check(1, 1, 1) is None
+    assert index.check(1, 1, 20) is None
+    assert index.check(1, 1, 21) == ('combined', '20-21')
+    assert index.check(1, 1, 24) == ('not_found', None)
+    assert index.check(1, 99, 1) == ('not_found', None)
+    assert index.check(13, 1, 1) == ('not_found', None)
+    # Chapters without an index entry can't rule anything out
+    assert index.check(1, 2, 500) is None
+
+
+def test_learned_counts_never_reject_verses(db):
+    index = _index([])
+    index.learn(1, 2, 10, [])
+
+    assert index.check(1, 2, 30) is None
+
+
+def test_next_text_skips_combined_verses_and_crosses_chapters(db):
+    index = _index([(1, 1, None, 23, [(20, 21)]), (1, 19, None, 40, []), (2, 1, None, 39, [])])
+
+    assert index.next_text(1, 1, 19) == (1, 1, 20)
+    assert index.next_text(1, 1, 20) == (1, 1, 22)
+    assert index.next_text(1, 1, 23) == (1, 2, 1)
+    assert index.next_text(1, 19, 40) == (2, 1, 1)
+    assert index.next_text(1, 5, 1) is None
+
+
+def test_prefetch_stops_at_the_chapter_end(db, monkeypatch):
+    monkeypatch.setattr(app_hybrid, 'CHAPTER_INDEX', _index([(1, 1, None, 23, [(20, 21)]), (1, 2, None, 39, [])]))
+    prefetcher = app_hybrid.Prefetcher(ahead=5, max_queued=10)
+
+    assert list(prefetcher._following(1, 1, 19)) == [(1, 1, 20), (1, 1, 22), (1, 1, 23)]
@@ -0,0 +1,55 @@
+import os
+
+import app_hybrid
+from conftest import REPO_DIR
+
+
+def _saved_page():
+    # debug_page.html is vedabase's advanced-view markup for SB 3.2.4, the layout chapter pages repeat per verse
+    with open(os.path.join(REPO_DIR, 'debug_page.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+def _chapter_page():
+    page = _saved_page()
+    return page + page.replace('>ŚB 3.2.4<', '>ŚB 3.2.5-6<')
+
+
+def test_sections_keep_inline_words_and_separators():
+    record = app_hybrid.parse_chapter_html(3, 2, _saved_page())[4]
+
+    assert record['word_meanings'].startswith('saḥ — Uddhava; muhūrtam — for a moment; abhūt — became;')
+    assert record['sanskrit_verse'].split('\n') == ['sa muhūrtam abhūt tūṣṇīṁ', 'kṛṣṇāṅghri-sudhayā bhṛśam',
+                                                   'tīvreṇa bhakti-yogena', 'nimagnaḥ sādhu nirvṛtaḥ']
+    assert record['devanagari_verse'].count('\n') == 1
+    assert record['translation'].startswith('For a moment he remained dead silent')
+    assert record['purport'].startswith('On the inquiry by Vidura')
+    for value in record.values():
+        assert 'Devanagari' not in value and 'Verse text' not in value and 'Synonyms' not in value
+
+
+def test_word_index_sees_every_gloss():
+    record = app_hybrid.parse_chapter_html(3, 2, _saved_page())[4]
+    pairs = dict(app_hybrid.parse_word_meanings(record['word_meanings']))
+
+    assert pairs['saḥ'] == 'Uddhava'
+    assert pairs['muhūrtam'] == 'for a moment'
+
+
+def test_combined_texts_are_keyed_by_their_first_verse():
+    verses = app_hybrid.parse_chapter_html(3, 2, _chapter_page())
+
+    assert sorted(verses) == [4, 5]
+    assert verses[5]['last_verse'] == 6
+    assert 'last_verse' not in verses[4]
+
+
+def test_ingest_stores_parsed_verses(db, monkeypatch):
+    monkeypatch.setattr(app_hybrid, '_chapter_page_html_http', lambda url: _chapter_page().encode())
+
+    verses = app_hybrid.ingest_chapter(3, 2, use_browser=False)
+    app_hybrid.flush_writes()
+
+    assert sorted(verses) == [4, 5]
+    assert app_hybrid.get_from_database(3, 2, 4, on_disk=True)['word_meanings'].startswith('saḥ — Uddhava;')
+    assert app_hybrid.get_missing_verse(3, 2, 6) == ('combined', '5-6')
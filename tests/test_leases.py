@@ -0,0 +1,41 @@
+import app_hybrid
+
+
+def test_lease_is_exclusive_until_released(db):
+    lease = app_hybrid.FetchLease.claim('verse:1.1.1')
+
+    assert lease is not None
+    assert app_hybrid.FetchLease.claim('verse:1.1.1') is None
+    assert app_hybrid._lease_state('verse:1.1.1') == 'held'
+
+    lease.release()
+
+    assert app_hybrid._lease_state('verse:1.1.1') == 'released'
+    again = app_hybrid.FetchLease.claim('verse:1.1.1')
+    assert again is not None
+    again.release()
+
+
+def test_expired_lease_can_be_taken_over(db):
+    lease = app_hybrid.FetchLease.claim('chapter:1.1')
+    with app_hybrid.db_connection() as conn, conn:
+        conn.execute('UPDATE fetch_leases SET expires_at = 0 WHERE resource = ?', ('chapter:1.1',))
+
+    assert app_hybrid._lease_state('chapter:1.1') == 'expired'
+    taken = app_hybrid.FetchLease.claim('chapter:1.1')
+    assert taken is not None
+    taken.release()
+    lease._released.set()
+
+
+def test_ready_is_checked_before_the_work(db):
+    calls = []
+
+    def work():
+        calls.append('work')
+        return 'scraped'
+
+    assert app_hybrid.run_under_lease('verse:1.1.2', lambda: 'stored', work) == 'stored'
+    assert app_hybrid.run_under_lease('verse:1.1.2', lambda: None, work) == 'scraped'
+    assert calls == ['work']
+    assert app_hybrid._lease_state('verse:1.1.2') == 'released'
@@ -0,0 +1,55 @@
+import sqlite3
+import threading
+import time
+
+import app_hybrid
+import config
+
+
+def _store_elsewhere(db, canto, chapter, verse):
+    # Another process (the crawler, another worker) commits a verse
+    with sqlite3.connect(db) as conn:
+        conn.execute("INSERT INTO verses (canto, chapter, verse, devanagari_verse, sanskrit_verse, word_meanings, "
+                     "translation, purport) VALUES (?, ?, ?, '', 's', 'w', 't', 'p')", (canto, chapter, verse))
+
+
+def test_rebuild_picks_up_verses_stored_elsewhere(db, monkeypatch):
+    monkeypatch.setattr(config, 'PRESENCE_REFRESH', 60)
+    presence = app_hybrid.PresenceBitmap()
+    assert not presence.contains(1, 1, 1)
+
+    _store_elsewhere(db, 1, 1, 1)
+    assert not presence.contains(1, 1, 1)
+
+    presence.built_at = time.time() - 61
+    assert presence.contains(1, 1, 1)
+    assert presence.counters['builds'] == 2
+
+
+def test_stale_bitmap_is_rebuilt_once(db, monkeypatch):
+    monkeypatch.setattr(config, 'PRESENCE_REFRESH', 60)
+    presence = app_hybrid.PresenceBitmap()
+    start = threading.Barrier(8)
+
+    def reader():
+        start.wait()
+        presence.contains(1, 1, 1)
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert presence.counters['builds'] == 1
+
+
+def test_discard_clears_a_stale_bit(db):
+    presence = app_hybrid.PresenceBitmap()
+    presence._current()
+    presence.add([app_hybrid.pack_verse_key(1, 1, 2)])
+    assert presence.contains(1, 1, 2)
+
+    presence.discard(1, 1, 2)
+
+    assert not presence.contains(1, 1, 2)
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+import app_hybrid
+
+zstandard = pytest.importorskip('zstandard')
+
+PURPORT = 'In this verse Śrīla Vyāsadeva explains that devotional service is the ultimate goal. ' * 6
+
+
+def _add_dictionary(db, dict_id, column='purport'):
+    samples = [f"{PURPORT} {n}".encode() for n in range(300)]
+    data = zstandard.train_dictionary(4096, samples).as_bytes()
+    with sqlite3.connect(db) as conn:
+        conn.execute('INSERT INTO compression_dicts (dict_id, column_name, dict) VALUES (?, ?, ?)',
+                     (dict_id, column, data))
+    return zstandard.ZstdCompressionDict(data)
+
+
+def test_round_trip(db):
+    codec = app_hybrid.TextCodec()
+    _add_dictionary(db, 1)
+
+    value = codec.encode('purport', PURPORT)
+
+    assert value.startswith(app_hybrid.COMPRESSED_MAGIC)
+    assert len(value) < len(PURPORT.encode())
+    assert codec.decode(value) == PURPORT
+    assert codec.encode('purport', 'short') == 'short'
+    assert codec.decode('plain text') == 'plain text'
+
+
+def test_dictionary_added_after_load_is_picked_up(db):
+    codec = app_hybrid.TextCodec()
+    assert not codec.has_dictionary('purport')
+
+    # The compress tool, in another process, adds a dictionary and rewrites rows with it
+    dictionary = _add_dictionary(db, 7)
+    frame = zstandard.ZstdCompressor(dict_data=dictionary).compress(PURPORT.encode())
+    value = app_hybrid.COMPRESSED_MAGIC + (7).to_bytes(4, 'little') + frame
+
+    assert codec.decode(value) == PURPORT
+
+
+def test_unknown_dictionary_is_a_clear_error(db):
+    codec = app_hybrid.TextCodec()
+    _add_dictionary(db, 1)
+    value = codec.encode('purport', PURPORT)
+
+    with pytest.raises(ValueError, match='id 9'):
+        codec.decode(value[:4] + (9).to_bytes(4, 'little') + value[8:])
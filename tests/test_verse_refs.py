@@ -0,0 +1,34 @@
+import pytest
+
+import app_hybrid
+import config
+
+
+def test_ranges_and_lists_expand_in_request_order():
+    keys = app_hybrid.parse_verse_refs('SB 1.1.3-5, 2.3.4,1.1.4')
+
+    assert keys == [(1, 1, 3), (1, 1, 4), (1, 1, 5), (2, 3, 4)]
+
+
+def test_reversed_range_is_rejected():
+    with pytest.raises(ValueError, match='Invalid verse range'):
+        app_hybrid.parse_verse_refs('1.1.9-3')
+
+
+def test_malformed_reference_is_rejected():
+    with pytest.raises(ValueError, match='Invalid verse reference'):
+        app_hybrid.parse_verse_refs(['1.1.1', 'verse one'])
+
+
+def test_limit_counts_every_reference(monkeypatch):
+    monkeypatch.setattr(config, 'BATCH_MAX_VERSES', 10)
+
+    assert len(app_hybrid.parse_verse_refs('1.1.1-6,1.2.1-4')) == 10
+    with pytest.raises(ValueError, match='Too many verses'):
+        app_hybrid.parse_verse_refs('1.1.1-6,1.2.1-5')
+
+
+def test_huge_range_is_rejected_without_expanding_it(monkeypatch):
+    monkeypatch.setattr(config, 'BATCH_MAX_VERSES', 10)
+    with pytest.raises(ValueError, match='Too many verses'):
+        app_hybrid.parse_verse_refs('1.1.1-999999999999')